@@ -1,7 +1,27 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from unfold.admin import ModelAdmin
 from unfold.decorators import display
-from .models import Region, District, Tashkilot
+from .models import Region, District, Tashkilot, Job
+
+
+def count_subquery(queryset, outer_field, aggregate=None):
+    """
+    `outer_field=OuterRef('pk')` bo'yicha guruhlangan sonni qator ichidagi subquery
+    sifatida qaytaradi. JOIN + GROUP BY dan farqli ravishda bir nechta sanoq bir-birini
+    ko'paytirib yubormaydi.
+    """
+    aggregate = aggregate or Count('pk')
+    subquery = (
+        queryset.filter(**{outer_field: OuterRef('pk')})
+        .order_by()
+        .values(outer_field)
+        .annotate(total=aggregate)
+        .values('total')
+    )
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
 
 
 @admin.register(Region)
@@ -11,16 +31,23 @@ class RegionAdmin(ModelAdmin):
     list_display = ['name', 'display_districts_count', 'display_organizations_count']
     search_fields = ['name']
     ordering = ['name']
+    # Chegaralar `load_boundaries` buyrug'i bilan yuklanadi
+    exclude = ['boundary']
     
     @display(description="Tumanlar soni", ordering="districts_count")
     def display_districts_count(self, obj):
-        count = obj.districts.count()
-        return f"{count} ta"
+        return f"{obj.districts_count} ta"
     
-    @display(description="Tashkilotlar soni")
+    @display(description="Tashkilotlar soni", ordering="organizations_count")
     def display_organizations_count(self, obj):
-        count = sum(district.tashkilot_set.count() for district in obj.districts.all())
-        return f"{count} ta"
+        return f"{obj.organizations_count} ta"
+    
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.annotate(
+            districts_count=count_subquery(District.objects.all(), 'region'),
+            organizations_count=count_subquery(Tashkilot.objects.all(), 'hudud__region'),
+        )
 
 
 @admin.register(District)
@@ -40,18 +67,19 @@ class DistrictAdmin(ModelAdmin):
         }),
     )
     
-    @display(description="Viloyat")
+    @display(description="Viloyat", ordering="region__name")
     def display_region(self, obj):
         return obj.region.name
     
-    @display(description="Tashkilotlar soni")
+    @display(description="Tashkilotlar soni", ordering="organizations_count")
     def display_organizations_count(self, obj):
-        count = obj.tashkilot_set.count()
-        return f"{count} ta"
+        return f"{obj.organizations_count} ta"
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related('region')
+        return qs.select_related('region').defer('region__boundary').annotate(
+            organizations_count=count_subquery(Tashkilot.objects.all(), 'hudud'),
+        )
 
 
 @admin.register(Tashkilot)
@@ -72,6 +100,10 @@ class TashkilotAdmin(ModelAdmin):
         ('Aloqa ma\'lumotlari', {
             'fields': ('manzil', 'telefon', 'email')
         }),
+        ('Yo\'naltirish', {
+            'fields': ('location', 'service_area'),
+            'classes': ['collapse']
+        }),
     )
     
     @display(description="Joylashuv")
@@ -82,12 +114,48 @@ class TashkilotAdmin(ModelAdmin):
     
     @display(description="Murojaatlar soni", ordering="complaints_count")
     def display_complaints_count(self, obj):
-        from complaints.models import Complaint
-        count = Complaint.objects.filter(masul_tashkilot=obj).count()
-        return f"{count} ta"
+        return f"{obj.complaints_count} ta"
     
     def get_queryset(self, request):
+        from complaints.models import ComplaintCounter
         qs = super().get_queryset(request)
-        return qs.select_related('hudud', 'hudud__region')
+        return qs.select_related('hudud', 'hudud__region').defer(
+            'hudud__boundary', 'hudud__region__boundary',
+        ).annotate(
+            # Murojaatlar jadvalini sanash o'rniga tayyor hisoblagichlar yig'indisi
+            complaints_count=count_subquery(
+                ComplaintCounter.objects.all(), 'masul_tashkilot', aggregate=Sum('count'),
+            ),
+        )
     
     list_per_page = 25
+
+
+
+@admin.register(Job)
+class JobAdmin(ModelAdmin):
+    """Background job queue admin"""
+    
+    list_display = ['name', 'display_status', 'attempts', 'max_attempts', 'run_at', 'updated_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'last_error']
+    ordering = ['-created_at']
+    readonly_fields = ['attempts', 'locked_at', 'last_error', 'created_at', 'updated_at']
+    actions = ['retry_jobs']
+    
+    @display(description="Holat", label=True)
+    def display_status(self, obj):
+        status_colors = {
+            'pending': 'info',
+            'running': 'warning',
+            'done': 'success',
+            'dead': 'danger',
+        }
+        return obj.get_status_display(), status_colors.get(obj.status, 'info')
+    
+    @admin.action(description="Tanlangan vazifalarni qayta navbatga qo'yish")
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status='running').update(
+            status='pending', attempts=0, run_at=timezone.now(), last_error='',
+        )
+        self.message_user(request, f"{updated} ta vazifa navbatga qaytarildi")
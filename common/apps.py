@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CommonConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "common"
+
+    def ready(self):
+        # Ilovalarning tasks.py modullaridagi fon vazifalarini ro'yxatdan o'tkazish
+        autodiscover_modules('tasks')
+        from . import signals  # noqa: F401
@@ -0,0 +1,18 @@
+"""
+Nuqta bo'yicha viloyat va tumanni aniqlash (point-in-polygon).
+
+`boundary` maydonlaridagi GiST indekslari tufayli so'rov faqat nuqtani o'z
+ichiga olishi mumkin bo'lgan bir nechta poligonni tekshiradi.
+"""
+from .models import District, Region
+
+
+def locate(point):
+    """Nuqta tushgan (region_id, district_id); topilmasa mos qiymat None"""
+    if point is None:
+        return None, None
+    found = District.objects.filter(boundary__covers=point).values_list('region_id', 'id').first()
+    if found:
+        return found
+    region_id = Region.objects.filter(boundary__covers=point).values_list('id', flat=True).first()
+    return region_id, None
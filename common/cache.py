@@ -0,0 +1,69 @@
+"""
+Umumiy kesh ustidan "hisobla yoki keshdan ol" yordamchisi.
+
+Bir vaqtda ko'p so'rov bir xil kalitni qayta hisoblashining (cache stampede)
+oldi ikki usulda olinadi:
+  - qulf: kalitni faqat `cache.add` bilan qulfni olgan jarayon hisoblaydi,
+    qolganlari eski qiymatni qaytaradi yoki yangisini qisqa muddat kutadi;
+  - erta qayta hisoblash (XFetch): qiymat eskirishiga yaqinlashgani sari uni
+    muddatidan oldin yangilash ehtimoli oshadi, shuning uchun kalit hamma uchun
+    birdaniga yo'qolmaydi.
+Kesh backend'i settings.CACHES orqali tanlanadi (locmem, fayl yoki Redis).
+"""
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+EARLY_RECOMPUTE_BETA = 1.0
+
+
+def _is_fresh(entry, beta):
+    _value, duration, expires_at = entry
+    # -log(U), U ∈ (0, 1] - hisoblash qancha uzoq davom etsa, shuncha ertaroq yangilanadi
+    return time.time() - duration * beta * math.log(1.0 - random.random()) < expires_at
+
+
+def get_or_compute(key, compute, timeout, beta=EARLY_RECOMPUTE_BETA):
+    """
+    `key` bo'yicha keshdagi qiymatni, u bo'lmasa yoki erta yangilash vaqti kelgan
+    bo'lsa `compute()` natijasini qaytaradi va uni `timeout` soniyaga saqlaydi.
+    """
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry, beta):
+        return entry[0]
+
+    lock_key = f'{key}:lock'
+    locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    if not locked:
+        if entry is not None:
+            # Boshqa jarayon yangilamoqda - hozircha eski qiymat yetarli
+            return entry[0]
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        # Qulf egasi ulgurmadi - o'zimiz hisoblaymiz
+
+    try:
+        started = time.monotonic()
+        value = compute()
+        duration = time.monotonic() - started
+        cache.set(key, (value, duration, time.time() + timeout), timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
+
+
+def make_key(prefix, *parts, **params):
+    """Argumentlardan barqaror kesh kaliti (model obyektlari pk bilan almashtiriladi)"""
+    values = [str(getattr(part, 'pk', part)) for part in parts]
+    values += [f'{name}={getattr(value, "pk", value)}' for name, value in sorted(params.items())]
+    return ':'.join([prefix, *values])
@@ -0,0 +1,127 @@
+"""
+Ma'lumotlar bazasiga asoslangan yengil fon vazifalari navbati.
+
+Vazifa funksiyalari ilovalarning ``tasks.py`` modullarida ``@task`` bilan
+ro'yxatdan o'tkaziladi, so'rov ichida esa faqat ``enqueue()`` chaqiriladi.
+Vazifalarni ``manage.py run_worker`` bajaradi.
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Qayta urinishlar orasidagi kutish: 30s, 60s, 120s, ... (eng ko'pi 1 soat)
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 60 * 60
+# Shuncha vaqtdan beri `running` holatida turgan vazifa to'xtab qolgan worker'niki hisoblanadi
+STALE_AFTER = timedelta(minutes=15)
+
+_registry = {}
+
+
+def task(name):
+    """Funksiyani `name` nomi bilan fon vazifasi sifatida ro'yxatdan o'tkazadi"""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, run_at=None, max_attempts=5, **payload):
+    """
+    Vazifani navbatga qo'yadi. Joriy tranzaksiya ichida chaqirilsa, vazifa
+    tranzaksiya bilan birga saqlanadi (yoki bekor bo'ladi).
+    """
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def retry_delay(attempts):
+    delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim_jobs(limit):
+    """Bajarilishi kerak bo'lgan vazifalarni boshqa worker'lar bilan to'qnashmasdan band qiladi"""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True).filter(
+                status='pending',
+                run_at__lte=now,
+            ).order_by('run_at')[:limit]
+        )
+        if jobs:
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status='running',
+                locked_at=now,
+                attempts=F('attempts') + 1,
+            )
+            for job in jobs:
+                job.status = 'running'
+                job.locked_at = now
+                job.attempts += 1
+    return jobs
+
+
+def run_job(job):
+    func = _registry.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f"Ro'yxatdan o'tmagan vazifa: {job.name}")
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error("Vazifa %s muvaffaqiyatsiz tugadi: %s", job, error)
+            Job.objects.filter(pk=job.pk).update(
+                status='dead',
+                locked_at=None,
+                last_error=error,
+                updated_at=timezone.now(),
+            )
+        else:
+            logger.warning("Vazifa %s xato bilan tugadi, qayta uriniladi", job)
+            Job.objects.filter(pk=job.pk).update(
+                status='pending',
+                locked_at=None,
+                run_at=timezone.now() + retry_delay(job.attempts),
+                last_error=error,
+                updated_at=timezone.now(),
+            )
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status='done',
+        locked_at=None,
+        updated_at=timezone.now(),
+    )
+    return True
+
+
+def run_pending(limit=10):
+    """Navbatdagi vazifalardan `limit` tasini bajaradi va bajarilganlar sonini qaytaradi"""
+    jobs = claim_jobs(limit)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
+
+
+def requeue_stale_jobs():
+    """To'xtab qolgan worker band qilgan vazifalarni navbatga qaytaradi"""
+    return Job.objects.filter(
+        status='running',
+        locked_at__lt=timezone.now() - STALE_AFTER,
+    ).update(status='pending', locked_at=None, updated_at=timezone.now())
@@ -0,0 +1,111 @@
+from django.contrib.gis.gdal import CoordTransform, DataSource, SpatialReference
+from django.contrib.gis.geos import MultiPolygon
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from common import reference
+from common.models import District, Region
+
+
+class Command(BaseCommand):
+    help = "Viloyat yoki tuman chegaralarini GeoJSON/Shapefile faylidan yuklaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="GDAL o'qiy oladigan fayl (GeoJSON, Shapefile, ...)")
+        parser.add_argument(
+            '--level',
+            choices=['region', 'district'],
+            required=True,
+            help="Fayldagi obyektlar viloyatlarmi yoki tumanlar",
+        )
+        parser.add_argument('--name-field', default='name', help="Nom saqlangan atribut")
+        parser.add_argument(
+            '--region-field',
+            default='region',
+            help="Tumanlar uchun: viloyat nomi saqlangan atribut",
+        )
+        parser.add_argument('--layer', type=int, default=0, help="Qatlam tartib raqami")
+        parser.add_argument(
+            '--create',
+            action='store_true',
+            help="Bazada topilmagan viloyat/tumanlarni yaratish",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            layer = DataSource(options['path'])[options['layer']]
+        except Exception as exc:
+            raise CommandError(f"Faylni o'qib bo'lmadi: {exc}")
+        if layer.srs is None:
+            raise CommandError("Faylda koordinata tizimi ko'rsatilmagan")
+
+        transform = CoordTransform(layer.srs, SpatialReference(4326))
+        boundaries = {}
+        for feature in layer:
+            geom = feature.geom
+            if 'Polygon' not in geom.geom_type.name:
+                self.stderr.write(f"O'tkazib yuborildi ({geom.geom_type}): {feature.get(options['name_field'])}")
+                continue
+            geom.transform(transform)
+            geos = geom.geos
+            if geos.geom_type == 'Polygon':
+                geos = MultiPolygon(geos)
+            geos.srid = 4326
+
+            name = str(feature.get(options['name_field'])).strip()
+            parent = None
+            if options['level'] == 'district':
+                parent = str(feature.get(options['region_field'])).strip()
+            boundaries[(parent, name)] = geos
+
+        if options['level'] == 'region':
+            updated, created, missing = self._load_regions(boundaries, options['create'])
+        else:
+            updated, created, missing = self._load_districts(boundaries, options['create'])
+
+        # bulk_create/bulk_update signal yubormaydi
+        reference.invalidate()
+
+        for name in missing:
+            self.stderr.write(f"Bazada topilmadi: {name}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Chegaralar yuklandi: {updated} ta yangilandi, {created} ta yaratildi, {len(missing)} ta topilmadi"
+        ))
+
+    @transaction.atomic
+    def _load_regions(self, boundaries, create):
+        regions = {region.name: region for region in Region.objects.all()}
+        to_update, to_create, missing = [], [], []
+        for (_, name), geom in boundaries.items():
+            region = regions.get(name)
+            if region is not None:
+                region.boundary = geom
+                to_update.append(region)
+            elif create:
+                to_create.append(Region(name=name, boundary=geom))
+            else:
+                missing.append(name)
+        Region.objects.bulk_update(to_update, ['boundary'], batch_size=100)
+        Region.objects.bulk_create(to_create, batch_size=100)
+        return len(to_update), len(to_create), missing
+
+    @transaction.atomic
+    def _load_districts(self, boundaries, create):
+        regions = {region.name: region for region in Region.objects.all()}
+        districts = {
+            (district.region.name, district.name): district
+            for district in District.objects.select_related('region').defer('region__boundary')
+        }
+        to_update, to_create, missing = [], [], []
+        for (region_name, name), geom in boundaries.items():
+            district = districts.get((region_name, name))
+            if district is not None:
+                district.boundary = geom
+                to_update.append(district)
+            elif create and region_name in regions:
+                to_create.append(District(name=name, region=regions[region_name], boundary=geom))
+            else:
+                missing.append(f"{region_name} / {name}")
+        District.objects.bulk_update(to_update, ['boundary'], batch_size=100)
+        District.objects.bulk_create(to_create, batch_size=100)
+        return len(to_update), len(to_create), missing
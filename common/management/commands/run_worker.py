@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from common.jobs import requeue_stale_jobs, run_pending
+
+
+class Command(BaseCommand):
+    help = "Navbatdagi fon vazifalarini (email yuborish va h.k.) bajaradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=10, help="Bir marta band qilinadigan vazifalar soni")
+        parser.add_argument('--sleep', type=float, default=2.0, help="Navbat bo'sh bo'lganda kutish (soniya)")
+        parser.add_argument('--once', action='store_true', help="Navbatni bir marta bo'shatib chiqish")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Worker ishga tushdi")
+        while True:
+            requeue_stale_jobs()
+            processed = run_pending(options['batch'])
+            if processed:
+                self.stdout.write(f"{processed} ta vazifa bajarildi")
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,106 @@
+"""
+So'rovlar bo'yicha metrikalar (common/middleware.py yig'adi).
+
+Qiymatlar jarayon xotirasida saqlanadi va `/metrics` orqali Prometheus matn
+formatida beriladi. Har bir worker jarayoni o'z hisobini yuritadi - Prometheus
+ularni `instance` yorlig'i bo'yicha ajratib yig'adi.
+"""
+import threading
+from bisect import bisect_left
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # {view: [bucket hisoblari..., +Inf], yig'indi, soni}
+        self.series = {}
+
+    def observe(self, view, value):
+        counts, total, count = self.series.get(view) or ([0] * (len(self.buckets) + 1), 0, 0)
+        counts[bisect_left(self.buckets, value)] += 1
+        self.series[view] = (counts, total + value, count + 1)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for view, (counts, total, count) in sorted(self.series.items()):
+            label = _escape(view)
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {count}')
+        return lines
+
+
+class CounterMetric:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.series = {}
+
+    def inc(self, view, value=1):
+        self.series[view] = self.series.get(view, 0) + value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for view, value in sorted(self.series.items()):
+            lines.append(f'{self.name}{{view="{_escape(view)}"}} {value}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.request_duration = Histogram(
+            'http_request_duration_seconds', "So'rovning umumiy vaqti", DURATION_BUCKETS,
+        )
+        self.db_duration = Histogram(
+            'http_request_db_duration_seconds', "So'rov davomidagi SQL vaqti", DURATION_BUCKETS,
+        )
+        self.template_duration = Histogram(
+            'http_request_template_duration_seconds', 'Shablonni render qilish vaqti', DURATION_BUCKETS,
+        )
+        self.queries = Histogram(
+            'http_request_db_queries', "So'rov davomidagi SQL so'rovlar soni", QUERY_BUCKETS,
+        )
+        self.duplicate_queries = CounterMetric(
+            'http_request_db_duplicate_queries_total', "Takrorlangan SQL so'rovlar (N+1 belgisi)",
+        )
+        self.budget_violations = CounterMetric(
+            'http_request_budget_violations_total', "So'rov yoki vaqt byudjetidan oshgan so'rovlar",
+        )
+
+    def record(self, view, duration, db_duration, queries, duplicates, template_duration=None, over_budget=False):
+        with self.lock:
+            self.request_duration.observe(view, duration)
+            self.db_duration.observe(view, db_duration)
+            self.queries.observe(view, queries)
+            if template_duration is not None:
+                self.template_duration.observe(view, template_duration)
+            if duplicates:
+                self.duplicate_queries.inc(view, duplicates)
+            if over_budget:
+                self.budget_violations.inc(view)
+
+    def render(self):
+        with self.lock:
+            lines = []
+            for metric in (
+                self.request_duration, self.db_duration, self.template_duration,
+                self.queries, self.duplicate_queries, self.budget_violations,
+            ):
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
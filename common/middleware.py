@@ -0,0 +1,115 @@
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """`connection.execute_wrapper` uchun: SQL vaqti va takrorlangan so'rovlarni sanaydi"""
+
+    def __init__(self):
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            # Parametrlar hisobga olinmaydi: bir xil SQL ko'p marta - N+1 belgisi
+            self.statements[sql] += 1
+
+    @property
+    def count(self):
+        return sum(self.statements.values())
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+
+class RequestMetricsMiddleware:
+    """
+    Har bir so'rov uchun umumiy vaqt, SQL vaqti, so'rovlar soni, takroriy so'rovlar
+    va shablon render vaqtini view nomi bo'yicha yig'adi, ularni Server-Timing
+    sarlavhasiga yozadi va byudjetdan oshgan so'rovlarni logga chiqaradi.
+
+    StreamingHttpResponse (masalan, eksport) tanasi view qaytgandan keyin o'qiladi:
+    undagi so'rovlar ham sanaladi va metrikalar oqim tugaganda yoziladi, lekin
+    Server-Timing sarlavhasi oldin yuborilgani uchun faqat view vaqtini ko'rsatadi.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with self._recording(recorder):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        template_duration = getattr(request, '_metrics_template_duration', None)
+
+        timings = [
+            f'total;dur={duration * 1000:.1f}',
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries, {recorder.duplicates} duplicates"',
+        ]
+        if template_duration is not None:
+            timings.append(f'tpl;dur={template_duration * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(timings)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = self._stream(response.streaming_content, request, recorder, start)
+        else:
+            self._record(request, recorder, duration, template_duration)
+        return response
+
+    def _recording(self, recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def _stream(self, content, request, recorder, start):
+        try:
+            with self._recording(recorder):
+                yield from content
+        finally:
+            self._record(request, recorder, time.perf_counter() - start)
+
+    def _record(self, request, recorder, duration, template_duration=None):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        over_budget = (
+            recorder.count > settings.METRICS_QUERY_BUDGET
+            or duration * 1000 > settings.METRICS_LATENCY_BUDGET_MS
+        )
+
+        registry.record(
+            view, duration, recorder.duration, recorder.count, recorder.duplicates,
+            template_duration=template_duration, over_budget=over_budget,
+        )
+        if over_budget:
+            logger.warning(
+                "%s %s (%s): %.0f ms, %d SQL (%d takroriy, %.0f ms)",
+                request.method, request.path, view, duration * 1000,
+                recorder.count, recorder.duplicates, recorder.duration * 1000,
+            )
+
+    def process_template_response(self, request, response):
+        # TemplateResponse shu metoddan keyin render qilinadi
+        start = time.perf_counter()
+
+        def finished(rendered):
+            request._metrics_template_duration = time.perf_counter() - start
+
+        response.add_post_render_callback(finished)
+        return response
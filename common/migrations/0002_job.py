@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-17 11:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Vazifa')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Parametrlar')),
+                ('status', models.CharField(choices=[('pending', 'Navbatda'), ('running', 'Bajarilmoqda'), ('done', 'Bajarildi'), ('dead', 'Muvaffaqiyatsiz')], default='pending', max_length=20, verbose_name='Holat')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Urinishlar')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='Maksimal urinishlar')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Bajarish vaqti')),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, verbose_name='Oxirgi xato')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Fon vazifasi',
+                'verbose_name_plural': 'Fon vazifalari',
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['run_at'], name='job_pending_run_at_idx')],
+            },
+        ),
+    ]
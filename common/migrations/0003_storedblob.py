@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-17 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Fayl nomi')),
+                ('size', models.BigIntegerField(default=0, verbose_name='Hajmi (bayt)')),
+                ('refcount', models.PositiveIntegerField(default=0, verbose_name='Havolalar soni')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Saqlangan fayl',
+                'verbose_name_plural': 'Saqlangan fayllar',
+            },
+        ),
+    ]
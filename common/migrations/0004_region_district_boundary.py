@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-17 14:30
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_storedblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='region',
+            name='boundary',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326, verbose_name='Chegara'),
+        ),
+        migrations.AddField(
+            model_name='district',
+            name='boundary',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326, verbose_name='Chegara'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-17 15:00
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0004_region_district_boundary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tashkilot',
+            name='location',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, null=True, srid=4326, verbose_name='Lokatsiya'),
+        ),
+        migrations.AddField(
+            model_name='tashkilot',
+            name='service_area',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326, verbose_name='Xizmat hududi'),
+        ),
+    ]
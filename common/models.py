@@ -1,9 +1,39 @@
 from django.contrib.gis.db import models
+from django.utils import timezone
+
+class BoundaryManager(models.Manager):
+    """Chegara poligonlari katta - ular faqat aniq so'ralganda yuklanadi"""
+    deferred_fields = ('boundary',)
+
+    def get_queryset(self):
+        return super().get_queryset().defer(*self.deferred_fields)
+
+
+class TashkilotManager(BoundaryManager):
+    deferred_fields = ('service_area',)
+
+
+class LoadedNameMixin:
+    """Bazadan o'qilgan nomni eslab qoladi - nom o'zgarganini aniqlash uchun (common/signals.py)"""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_name = dict(zip(field_names, values)).get('name')
+        return instance
+
+    @property
+    def name_changed(self):
+        return getattr(self, '_loaded_name', self.name) != self.name
+
 
 # Create your models here.
-class Region(models.Model):
+class Region(LoadedNameMixin, models.Model):
     name = models.CharField(max_length=255, verbose_name="Viloyat nomi")
+    # `load_boundaries` buyrug'i bilan yuklanadi; GiST indeksini maydon o'zi yaratadi
+    boundary = models.MultiPolygonField(srid=4326, null=True, blank=True, verbose_name="Chegara")
 
+    objects = BoundaryManager()
     
     def __str__(self):
         return self.name
@@ -13,9 +43,12 @@ class Region(models.Model):
         verbose_name_plural = "Viloyatlar"
 
 # 2. DISTRICTS
-class District(models.Model):
+class District(LoadedNameMixin, models.Model):
     name = models.CharField(max_length=255, verbose_name="Tuman nomi")
     region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name='districts', verbose_name="Viloyat")
+    boundary = models.MultiPolygonField(srid=4326, null=True, blank=True, verbose_name="Chegara")
+
+    objects = BoundaryManager()
     
     def __str__(self):
         return self.name
@@ -31,10 +64,73 @@ class Tashkilot(models.Model):
     telefon = models.CharField(max_length=50, verbose_name="Telefon")
     email = models.EmailField(verbose_name="Email")
     hudud = models.ForeignKey(District, on_delete=models.SET_NULL, null=True, verbose_name="Hudud (Tuman)")
+    # Murojaatlarni yo'naltirish uchun (complaints/routing.py)
+    location = models.PointField(srid=4326, null=True, blank=True, verbose_name="Lokatsiya")
+    service_area = models.MultiPolygonField(srid=4326, null=True, blank=True, verbose_name="Xizmat hududi")
+
+    objects = TashkilotManager()
 
     def __str__(self):
         return self.name
 
     class Meta:
         verbose_name = "Tashkilot"
-        verbose_name_plural = "Tashkilotlar"
\ No newline at end of file
+        verbose_name_plural = "Tashkilotlar"
+
+
+# 4. FON VAZIFALARI NAVBATI
+class Job(models.Model):
+    """
+    Ma'lumotlar bazasidagi fon vazifasi (common/jobs.py). `run_worker` buyrug'i
+    navbatdagi vazifalarni bajaradi, xatoda qayta urinadi va urinishlar tugasa
+    vazifani `dead` holatiga o'tkazadi.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Navbatda'),
+        ('running', 'Bajarilmoqda'),
+        ('done', 'Bajarildi'),
+        ('dead', 'Muvaffaqiyatsiz'),
+    )
+
+    name = models.CharField(max_length=100, verbose_name="Vazifa")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Parametrlar")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Holat")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Urinishlar")
+    max_attempts = models.PositiveSmallIntegerField(default=5, verbose_name="Maksimal urinishlar")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Bajarish vaqti")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, verbose_name="Oxirgi xato")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
+
+    class Meta:
+        verbose_name = "Fon vazifasi"
+        verbose_name_plural = "Fon vazifalari"
+        indexes = [
+            models.Index(
+                fields=['run_at'],
+                name='job_pending_run_at_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+
+
+# 5. FAYLLAR (mazmun bo'yicha saqlash, common/storage.py)
+class StoredBlob(models.Model):
+    name = models.CharField(max_length=255, unique=True, verbose_name="Fayl nomi")
+    size = models.BigIntegerField(default=0, verbose_name="Hajmi (bayt)")
+    refcount = models.PositiveIntegerField(default=0, verbose_name="Havolalar soni")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "Saqlangan fayl"
+        verbose_name_plural = "Saqlangan fayllar"
@@ -0,0 +1,277 @@
+"""
+Katta ro'yxatlar uchun keyset (cursor) sahifalash.
+
+OFFSET o'rniga oxirgi ko'rilgan qatorning (`created_at`, `id`) qiymatlaridan
+keyingi qatorlar so'raladi, shuning uchun har qanday sahifa indeks bo'yicha
+bir xil tezlikda ochiladi. Kursor tokenlari imzolangan va shaffof emas.
+"""
+import hashlib
+import json
+from functools import cached_property
+
+from django.contrib.admin.views.main import IS_FACETS_VAR, ORDER_VAR, PAGE_VAR
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.http import Http404
+
+CURSOR_SALT = 'common.pagination.cursor'
+# Bahosi shundan kichik natijalar aniq COUNT(*) bilan sanaladi
+ESTIMATE_COUNT_THRESHOLD = 10000
+# Admin list_filter facet sonlari keshda saqlanadigan vaqt (soniya)
+FACET_CACHE_TTL = 60
+FACET_VERSION_KEY = 'admin-facets:version'
+
+
+def estimate_count(queryset):
+    """
+    Qatorlar sonini PostgreSQL rejalashtiruvchisi baholari bo'yicha qaytaradi:
+    filtrsiz so'rov uchun pg_class.reltuples, filtrli so'rov uchun EXPLAIN.
+    Baho mavjud bo'lmasa None qaytadi.
+    """
+    queryset = queryset.order_by()
+    if not queryset.query.where:
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # ANALYZE qilinmagan jadval uchun reltuples = -1
+        if row and row[0] >= 0:
+            return row[0]
+        return None
+
+    plan = json.loads(queryset.explain(format='json'))
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan['Plan']['Plan Rows'])
+
+
+def encode_cursor(direction, values, ordering):
+    values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+    return signing.dumps(
+        {'d': direction, 'v': values, 'o': list(ordering)}, salt=CURSOR_SALT, compress=True,
+    )
+
+
+def decode_cursor(token, ordering):
+    """
+    Kursordagi (yo'nalish, qiymatlar) juftligi. Kursor boshqa tartiblash uchun
+    yaratilgan bo'lsa (masalan, qidiruv natijalaridagi `-search_rank` kursori
+    qidiruvsiz sahifaga berilsa), qiymatlar boshqa maydonlarga tushmasligi uchun 404.
+    """
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+        direction, values, cursor_ordering = data['d'], data['v'], data['o']
+    except (signing.BadSignature, KeyError, TypeError):
+        raise Http404("Sahifa kursori noto'g'ri")
+    if cursor_ordering != list(ordering):
+        raise Http404("Sahifa kursori boshqa tartiblash uchun")
+    return direction, values
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+class KeysetPaginator:
+    """
+    `ordering` - tartiblash maydonlari, oxirgisi yagona bo'lishi kerak (odatda `id`).
+    `estimate_count=True` bo'lsa, katta natijalarning jami soni aniq COUNT(*)
+    o'rniga bahodan olinadi.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id'), estimate_count=False):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.estimate_count = estimate_count
+
+    @cached_property
+    def count(self):
+        self._count_estimated = False
+        if self.estimate_count:
+            estimated = estimate_count(self.queryset)
+            # Kichik natijalarni aniq sanash arzon - baho faqat katta natijalar uchun
+            if estimated is not None and estimated >= ESTIMATE_COUNT_THRESHOLD:
+                self._count_estimated = True
+                return estimated
+        return self.queryset.count()
+
+    @property
+    def count_is_estimated(self):
+        """Jami son bahodan olinganmi (aniq COUNT(*) ishlatilgan bo'lsa False)"""
+        self.count
+        return self._count_estimated
+
+    def _fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def _after(self, values, reverse=False):
+        """Berilgan kalitdan keyin (reverse=True bo'lsa oldin) keladigan qatorlar sharti"""
+        fields = self._fields()
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(fields, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+
+        # OR shartidan rejalashtiruvchi indeks chegarasini chiqara olmaydi,
+        # shuning uchun birinchi maydon bo'yicha ortiqcha (lekin indeksli) chegara qo'shamiz
+        first_name, first_descending = fields[0]
+        bound = 'lte' if first_descending != reverse else 'gte'
+        return Q(**{f'{first_name}__{bound}': values[0]}) & condition
+
+    def _key(self, obj):
+        return [getattr(obj, name) for name, _descending in self._fields()]
+
+    def page(self, cursor=None):
+        queryset = self.queryset.order_by(*self.ordering)
+        direction, values = decode_cursor(cursor, self.ordering) if cursor else ('next', None)
+        backwards = direction == 'prev'
+
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse=backwards))
+        if backwards:
+            queryset = queryset.reverse()
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = encode_cursor('next', self._key(rows[-1]), self.ordering)
+            if values is not None and (has_more or not backwards):
+                previous_cursor = encode_cursor('prev', self._key(rows[0]), self.ordering)
+        return KeysetPage(rows, self, next_cursor, previous_cursor)
+
+
+class KeysetPaginationMixin:
+    """
+    ListView uchun keyset sahifalash. Ko'rinishga qo'shilganda `page` o'rniga
+    `cursor` GET parametri ishlatiladi, boshqa filtr parametrlari saqlanib qoladi.
+    """
+    keyset_ordering = ('-created_at', '-id')
+    keyset_estimate_count = False
+    cursor_kwarg = 'cursor'
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(
+            queryset,
+            page_size,
+            ordering=self.get_keyset_ordering(),
+            estimate_count=self.keyset_estimate_count,
+        )
+        page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Katta natijalarda COUNT(*) o'rniga rejalashtiruvchi bahosini ishlatadi.
+    Baho `threshold` dan kichik (yoki mavjud bo'lmasa) aniq son hisoblanadi.
+    """
+    threshold = ESTIMATE_COUNT_THRESHOLD
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            estimated = estimate_count(self.object_list)
+            if estimated is not None and estimated >= self.threshold:
+                return estimated
+        return super().count
+
+
+def facets_version():
+    version = cache.get(FACET_VERSION_KEY)
+    if version is None:
+        cache.add(FACET_VERSION_KEY, 1, None)
+        version = cache.get(FACET_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_facets():
+    """Keshdagi barcha admin facet sonlarini eskirgan deb belgilaydi (barcha workerlar uchun)"""
+    try:
+        cache.incr(FACET_VERSION_KEY)
+    except ValueError:
+        cache.set(FACET_VERSION_KEY, 2, None)
+
+
+class CachedFacetsChangeList:
+    """
+    list_filter facet sonlarini qisqa muddatga keshlaydigan ChangeList qo'shimchasi.
+    Kalitda umumiy versiya bor: ma'lumot o'zgarganda `invalidate_facets()` uni oshiradi.
+    """
+
+    def get_filters(self, request):
+        filters = super().get_filters(request)
+        for spec in filters[0]:
+            if hasattr(spec, 'get_facet_queryset'):
+                spec.get_facet_queryset = self._cached_facets(spec, spec.get_facet_queryset)
+        return filters
+
+    def _cached_facets(self, spec, compute):
+        # Filtrning o'z parametrlari facet so'roviga ta'sir qilmaydi
+        ignored = {*spec.expected_parameters(), PAGE_VAR, ORDER_VAR, IS_FACETS_VAR}
+        params = sorted(
+            (name, value)
+            for name, values in spec.request.GET.lists() if name not in ignored
+            for value in values
+        )
+        digest = hashlib.md5(
+            json.dumps([type(spec).__name__, getattr(spec, 'field_path', spec.title), params], default=str).encode(),
+        ).hexdigest()
+        label = self.model._meta.label_lower
+
+        def get_facet_queryset(changelist):
+            key = f'admin-facets:{facets_version()}:{label}:{digest}'
+            return cache.get_or_set(key, lambda: compute(changelist), FACET_CACHE_TTL)
+
+        return get_facet_queryset
+
+
+class EstimatedCountAdminMixin:
+    """
+    ModelAdmin uchun: jami son baholanadi, "hammasi" soni so'ralmaydi va
+    list_filter facet sonlari FACET_CACHE_TTL soniya keshlanadi.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        base = super().get_changelist(request, **kwargs)
+        return type(f'CachedFacets{base.__name__}', (CachedFacetsChangeList, base), {})
@@ -0,0 +1,88 @@
+"""
+Kam o'zgaradigan ma'lumotnomalar (viloyatlar, tumanlar, tashkilotlar) keshi.
+
+Ikki daraja: jarayon xotirasi va umumiy Django keshi. Kalitlar umumiy versiya
+raqamini o'z ichiga oladi; model saqlanganda yoki o'chirilganda (common/signals.py)
+versiya oshiriladi va barcha workerlardagi eski yozuvlar o'z-o'zidan eskiradi.
+Jarayon xotirasidagi nusxa versiyani har LOCAL_CHECK_INTERVAL soniyada tekshiradi.
+
+Ma'lumotlar `.values()` orqali olinadi - chegara geometriyalari yuklanmaydi.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+from .cache import get_or_compute
+from .models import District, Region, Tashkilot
+
+VERSION_KEY = 'reference:version'
+LOCAL_CHECK_INTERVAL = 5
+CACHE_TIMEOUT = 24 * 60 * 60
+
+LOADERS = {
+    'regions': lambda: list(Region.objects.order_by('name').values('id', 'name')),
+    'districts': lambda: list(District.objects.order_by('name').values('id', 'name', 'region_id')),
+    'organizations': lambda: list(Tashkilot.objects.order_by('name').values('id', 'name', 'hudud_id')),
+}
+
+_local = threading.local()
+
+
+def _version():
+    now = time.monotonic()
+    checked_at = getattr(_local, 'checked_at', None)
+    if checked_at is None or now - checked_at > LOCAL_CHECK_INTERVAL:
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, 1, None)
+            version = cache.get(VERSION_KEY, 1)
+        if version != getattr(_local, 'version', None):
+            _local.data = {}
+        _local.version = version
+        _local.checked_at = now
+    return _local.version
+
+
+def version():
+    """Joriy ma'lumotnomalar versiyasi (boshqa kesh kalitlariga qo'shish uchun)"""
+    return _version()
+
+
+def get(name):
+    """`name` ma'lumotnomasini (lug'atlar ro'yxati) qaytaradi"""
+    version = _version()
+    if name in _local.data:
+        return _local.data[name]
+    data = get_or_compute(f'reference:{version}:{name}', LOADERS[name], CACHE_TIMEOUT)
+    _local.data[name] = data
+    return data
+
+
+def invalidate():
+    """Barcha ma'lumotnomalarni eskirgan deb belgilaydi (barcha workerlar uchun)"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
+    _local.checked_at = None
+
+
+def regions():
+    return get('regions')
+
+
+def districts():
+    return get('districts')
+
+
+def organizations():
+    return get('organizations')
+
+
+def choices(name, empty_label=None):
+    """Select maydoni uchun (id, nom) juftliklari"""
+    items = [(item['id'], item['name']) for item in get(name)]
+    if empty_label is not None:
+        items.insert(0, ('', empty_label))
+    return items
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import reference, tiles
+from .models import District, Region, Tashkilot
+
+
+@receiver([post_save, post_delete], sender=Region)
+@receiver([post_save, post_delete], sender=District)
+@receiver([post_save, post_delete], sender=Tashkilot)
+def invalidate_reference_data(sender, **kwargs):
+    # Tranzaksiya tugamasdan kesh qayta to'ldirilsa, unga eski ma'lumot yozilib qoladi
+    transaction.on_commit(reference.invalidate)
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_save, sender=District)
+def clear_tiles_on_rename(sender, instance, created, **kwargs):
+    # Tayllarda viloyat/tuman nomlari bor - nom o'zgarsa butun kesh eskiradi
+    if not created and instance.name_changed:
+        transaction.on_commit(tiles.clear_cache)
+    instance._loaded_name = instance.name
+
+
+@receiver(post_delete, sender=Region)
+@receiver(post_delete, sender=District)
+def clear_tiles_on_delete(sender, **kwargs):
+    transaction.on_commit(tiles.clear_cache)
@@ -0,0 +1,120 @@
+"""
+Mazmun bo'yicha manzillanadigan (content-addressed) fayl saqlash.
+
+Har bir fayl SHA-256 xeshi bo'yicha ``blobs/ab/cd/<xesh><kengaytma>`` nomi
+bilan faqat bir marta yoziladi. Nechta maydon shu faylga ishora qilayotgani
+StoredBlob.refcount'da saqlanadi va fayl oxirgi havola o'chirilgandagina
+diskdan o'chiriladi. Fayl vaqtinchalik nomdan os.replace bilan joyiga qo'yiladi,
+bir blob ustidagi saqlash va o'chirish esa advisory lock bilan navbatga turadi.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def file_digest(content):
+    """Faylni bo'laklab o'qib xeshlaydi - fayl xotiraga to'liq yuklanmaydi"""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    prefix = 'blobs'
+
+    def blob_name(self, digest, ext):
+        return f'{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}'
+
+    def get_available_name(self, name, max_length=None):
+        # Bir xil mazmun - bir xil nom; takrorlanish bu yerda xato emas
+        return name
+
+    def _lock(self, name):
+        # Shu blob nomi bo'yicha saqlash va o'chirishni tranzaksiya oxirigacha navbatga qo'yadi
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [name])
+
+    def _write(self, name, content):
+        """Faylni vaqtinchalik nomga yozib, keyin os.replace bilan joyiga qo'yadi"""
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in content.chunks():
+                    fh.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            # Bir xil mazmunni parallel yozish xavfsiz - ikkalasi ham bir xil fayl qo'yadi
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _save(self, name, content):
+        from .models import StoredBlob
+
+        name = self.blob_name(file_digest(content), os.path.splitext(name)[1])
+        with transaction.atomic():
+            self._lock(name)
+            blob, created = StoredBlob.objects.select_for_update().get_or_create(
+                name=name,
+                defaults={'size': content.size, 'refcount': 1},
+            )
+            if not created:
+                StoredBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+            # Yangi qator uchun fayl har doim yoziladi: eski qator o'chirilgan bo'lsa,
+            # diskdagi nusxa o'chirish navbatida turgan bo'lishi mumkin
+            if created or not self.exists(name):
+                self._write(name, content)
+        return name
+
+    def delete(self, name):
+        from .models import StoredBlob
+
+        if not name:
+            return
+        with transaction.atomic():
+            self._lock(name)
+            blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                # Hisobga olinmagan (eski) fayl
+                super().delete(name)
+                return
+            if blob.refcount > 1:
+                StoredBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+                return
+            blob.delete()
+            transaction.on_commit(lambda: self._delete_if_unreferenced(name))
+
+    def _delete_if_unreferenced(self, name):
+        from .models import StoredBlob
+
+        # Qulf parallel _save tranzaksiyasi tugashini kutadi: u qatorni qayta yaratgan
+        # bo'lsa, tekshiruv uni ko'radi va fayl saqlanib qoladi
+        with transaction.atomic():
+            self._lock(name)
+            if not StoredBlob.objects.filter(name=name).exists():
+                super().delete(name)
+
+
+_content_addressed_storage = ContentAddressedStorage()
+
+
+def content_addressed_storage():
+    """ImageField(storage=...) uchun - migratsiyalarda funksiya nomi saqlanadi"""
+    return _content_addressed_storage
@@ -0,0 +1,9 @@
+from django.core.mail import send_mail
+
+from .jobs import task
+
+
+@task('send_email')
+def send_email(subject, message, recipient_list, from_email=None):
+    # Xato bo'lsa istisno navbatga qaytadi va vazifa keyinroq qayta uriniladi
+    send_mail(subject, message, from_email, recipient_list, fail_silently=False)
@@ -1,3 +1,690 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.gis.geos import Point
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from complaints.models import Complaint
+from users.models import CustomUser
+
+from . import jobs, reference, tiles
+from .cache import get_or_compute
+from .metrics import Registry
+from .middleware import RequestMetricsMiddleware
+from .models import District, Job, Region, StoredBlob, Tashkilot
+from .pagination import EstimatedCountPaginator, KeysetPaginator
+from .storage import ContentAddressedStorage
+from .views import MAP_CLUSTER_MAX_ZOOM, parse_map_filters
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+FAKE_REDIS_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/0',
+        'OPTIONS': {'connection_class': fakeredis.FakeConnection} if fakeredis else {},
+    },
+}
+
+
+class MapFilterTests(SimpleTestCase):
+    def test_filters_are_normalized(self):
+        filters = parse_map_filters({'region': '3', 'district': '', 'status': 'new', 'priority': 'high'})
+        self.assertEqual(filters, {'region': 3, 'status': 'new', 'priority': 'high'})
+
+    def test_invalid_filters_are_rejected(self):
+        for params in ({'region': 'abc'}, {'district': '1.5'}, {'status': 'deleted'}, {'priority': 'urgent'}):
+            with self.subTest(params=params):
+                self.assertIsNone(parse_map_filters(params))
+
+    def test_map_endpoints_return_400_on_invalid_filters(self):
+        for name in ('map_points', 'map_clusters'):
+            with self.subTest(view=name):
+                response = self.client.get(reverse(name), {'bbox': '60,37,73,46', 'zoom': '6', 'region': 'abc'})
+                self.assertEqual(response.status_code, 400)
+
+    def test_map_endpoints_return_400_on_non_finite_bbox(self):
+        for bbox in ('nan,37,73,46', '60,37,inf,46', '-inf,-inf,inf,inf', '60,nan,73,nan'):
+            for name in ('map_points', 'map_clusters'):
+                with self.subTest(bbox=bbox, view=name):
+                    response = self.client.get(reverse(name), {'bbox': bbox, 'zoom': '6'})
+                    self.assertEqual(response.status_code, 400)
+
+    def test_tile_endpoint_returns_400_on_invalid_filters(self):
+        for params in ({'region': 'abc'}, {'status': 'deleted'}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('complaint_tile', args=(6, 43, 23)), params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_tile_cache_key_ignores_unknown_parameters(self):
+        self.assertEqual(tiles.filter_key({}), 'all')
+        self.assertEqual(
+            tiles.filter_key(parse_map_filters({'region': '03', 'status': 'new', 'foo': 'bar'})),
+            tiles.filter_key({'region': 3, 'status': 'new'}),
+        )
+
+
+class MapClusterTests(TestCase):
+    BBOX = '60,37,73,46'
+
+    @classmethod
+    def setUpTestData(cls):
+        region = Region.objects.create(name='Toshkent viloyati')
+        user = CustomUser.objects.create_user('fuqaro', password='parol123')
+
+        def create(lng, lat, **kwargs):
+            return Complaint.objects.create(
+                title='Chiqindi', description='Matn', region=region, user=user,
+                location=Point(lng, lat, srid=4326), **kwargs,
+            )
+
+        # Toshkent atrofida uchta, Samarqandda bitta murojaat
+        cls.tashkent = [
+            create(69.24, 41.31, priority='high'),
+            create(69.25, 41.32),
+            create(69.26, 41.30, priority='low', status='closed'),
+        ]
+        cls.samarkand = create(66.96, 39.65, priority='high', status='in_progress')
+        Complaint.objects.create(title='Joylashuvsiz', description='Matn', region=region, user=user)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, zoom, **params):
+        response = self.client.get(reverse('map_clusters'), {'bbox': self.BBOX, 'zoom': zoom, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_low_zoom_returns_clusters_with_breakdown(self):
+        data = self.get(6)
+
+        self.assertEqual(data['type'], 'clusters')
+        self.assertEqual(data['zoom'], 6)
+        clusters = sorted(data['clusters'], key=lambda cluster: -cluster['count'])
+        self.assertEqual([cluster['count'] for cluster in clusters], [3, 1])
+
+        tashkent, samarkand = clusters
+        self.assertAlmostEqual(tashkent['lat'], 41.31, places=2)
+        self.assertAlmostEqual(tashkent['lng'], 69.25, places=2)
+        self.assertEqual(tashkent['priority'], {'low': 1, 'medium': 0, 'high': 1, 'none': 1})
+        self.assertEqual(tashkent['status'], {'new': 2, 'in_progress': 0, 'closed': 1, 'rejected': 0})
+        self.assertEqual(samarkand['priority'], {'low': 0, 'medium': 0, 'high': 1, 'none': 0})
+        self.assertEqual(samarkand['status'], {'new': 0, 'in_progress': 1, 'closed': 0, 'rejected': 0})
+
+    def test_clusters_respect_filters(self):
+        data = self.get(6, status='new')
+        self.assertEqual([cluster['count'] for cluster in data['clusters']], [2])
+
+    def test_high_zoom_returns_points(self):
+        data = self.get(MAP_CLUSTER_MAX_ZOOM)
+
+        self.assertEqual(data['type'], 'points')
+        self.assertFalse(data['truncated'])
+        self.assertEqual(
+            {point['id'] for point in data['points']},
+            {complaint.pk for complaint in [*self.tashkent, self.samarkand]},
+        )
+        self.assertEqual(self.get(MAP_CLUSTER_MAX_ZOOM - 1)['type'], 'clusters')
+
+
+class KeysetCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('Andijon', 'Buxoro', "Farg'ona", 'Jizzax', 'Xorazm'):
+            Region.objects.create(name=name)
+
+    def test_cursor_pages_through_results(self):
+        paginator = KeysetPaginator(Region.objects.all(), 2, ordering=('name', 'id'))
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        self.assertEqual([region.name for region in second], ["Farg'ona", 'Jizzax'])
+        self.assertEqual([region.name for region in paginator.page(second.previous_cursor)], ['Andijon', 'Buxoro'])
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        cursor = KeysetPaginator(Region.objects.all(), 2, ordering=('name', 'id')).page().next_cursor
+        for ordering in (('-id',), ('-name', '-id'), ('name', 'id', 'pk')):
+            with self.subTest(ordering=ordering), self.assertRaises(Http404):
+                KeysetPaginator(Region.objects.all(), 2, ordering=ordering).page(cursor)
+
+    def test_tampered_cursor_is_rejected(self):
+        cursor = KeysetPaginator(Region.objects.all(), 2, ordering=('name', 'id')).page().next_cursor
+        with self.assertRaises(Http404):
+            KeysetPaginator(Region.objects.all(), 2, ordering=('name', 'id')).page(cursor[:-2] + 'xx')
+
+
+class KeysetPaginatorCountTests(TestCase):
+    def setUp(self):
+        Region.objects.create(name='Toshkent viloyati')
+        self.paginator = KeysetPaginator(Region.objects.all(), 10, ordering=('name', 'id'), estimate_count=True)
+
+    def test_large_estimate_is_used(self):
+        with mock.patch('common.pagination.estimate_count', return_value=50000), self.assertNumQueries(0):
+            self.assertEqual(self.paginator.count, 50000)
+            self.assertTrue(self.paginator.count_is_estimated)
+
+    def test_exact_count_fallback_is_not_reported_as_estimate(self):
+        for estimate in (None, 3):
+            with self.subTest(estimate=estimate):
+                paginator = KeysetPaginator(Region.objects.all(), 10, estimate_count=True)
+                with mock.patch('common.pagination.estimate_count', return_value=estimate):
+                    self.assertEqual(paginator.count, 1)
+                    self.assertFalse(paginator.count_is_estimated)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        Region.objects.create(name='Toshkent viloyati')
+        Region.objects.create(name='Samarqand viloyati')
+
+    def test_estimate_is_used_above_threshold(self):
+        paginator = EstimatedCountPaginator(Region.objects.order_by('name'), 10)
+        with mock.patch('common.pagination.estimate_count', return_value=50000), self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 50000)
+        self.assertEqual(paginator.num_pages, 5000)
+
+    def test_exact_count_below_threshold(self):
+        for estimate in (None, 0, EstimatedCountPaginator.threshold - 1):
+            with self.subTest(estimate=estimate):
+                paginator = EstimatedCountPaginator(Region.objects.order_by('name'), 10)
+                with mock.patch('common.pagination.estimate_count', return_value=estimate):
+                    self.assertEqual(paginator.count, 2)
+
+    def test_lists_are_counted_directly(self):
+        with mock.patch('common.pagination.estimate_count') as estimate:
+            self.assertEqual(EstimatedCountPaginator([1, 2, 3], 2).count, 3)
+        estimate.assert_not_called()
+
+
+@override_settings(TILE_CACHE_DIR=tempfile.gettempdir() + '/test-tiles')
+class ReferenceDataTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.region = Region.objects.create(name='Toshkent viloyati')
+        cls.district = District.objects.create(name='Chirchiq', region=cls.region)
+
+    def setUp(self):
+        cache.clear()
+        # Jarayon xotirasidagi nusxa oldingi testlardan qolmasin
+        reference._local.__dict__.clear()
+
+    def test_data_is_loaded_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(reference.regions(), [{'id': self.region.pk, 'name': 'Toshkent viloyati'}])
+        with self.assertNumQueries(0):
+            reference.regions()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                reference.districts(),
+                [{'id': self.district.pk, 'name': 'Chirchiq', 'region_id': self.region.pk}],
+            )
+        with self.assertNumQueries(0):
+            reference.districts()
+
+        # Boshqa worker: jarayon xotirasi bo'sh, umumiy kesh to'la
+        reference._local.__dict__.clear()
+        with self.assertNumQueries(0):
+            reference.regions()
+            reference.districts()
+
+    def test_save_and_delete_bump_version(self):
+        reference.regions()
+        reference.districts()
+
+        for change in (
+            lambda: Region.objects.create(name='Samarqand viloyati'),
+            lambda: District.objects.get(pk=self.district.pk).save(),
+            lambda: District.objects.get(pk=self.district.pk).delete(),
+        ):
+            version = reference.version()
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertGreater(reference.version(), version)
+
+        with self.assertNumQueries(2):
+            regions = reference.regions()
+            districts = reference.districts()
+        self.assertEqual([item['name'] for item in regions], ['Samarqand viloyati', 'Toshkent viloyati'])
+        self.assertEqual(districts, [])
+
+    def test_version_is_not_bumped_before_commit(self):
+        version = reference.version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Region.objects.create(name='Samarqand viloyati')
+            self.assertEqual(reference.version(), version)
+        self.assertEqual(len(callbacks), 1)
+
+
+@jobs.task('tests.fail')
+def failing_task(**payload):
+    raise RuntimeError('xato')
+
+
+class JobQueueTests(TestCase):
+    def test_enqueue_and_run_email_job(self):
+        job = jobs.enqueue('send_email', subject='Salom', message='Matn', recipient_list=['a@example.com'])
+        self.assertEqual(job.status, 'pending')
+
+        self.assertEqual(jobs.run_pending(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Salom')
+
+    def test_future_jobs_are_not_claimed(self):
+        jobs.enqueue('send_email', run_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(jobs.claim_jobs(10), [])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        job = jobs.enqueue('tests.fail', max_attempts=3)
+        started = timezone.now()
+
+        jobs.run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('RuntimeError', job.last_error)
+        self.assertGreaterEqual(job.run_at, started + timedelta(seconds=jobs.RETRY_BASE_DELAY * 0.8))
+        self.assertLessEqual(job.run_at, timezone.now() + timedelta(seconds=jobs.RETRY_BASE_DELAY * 1.2))
+
+    def test_retry_delay_grows_and_is_capped(self):
+        with mock.patch('common.jobs.random.uniform', return_value=1.0):
+            self.assertEqual(jobs.retry_delay(1), timedelta(seconds=30))
+            self.assertEqual(jobs.retry_delay(3), timedelta(seconds=120))
+            self.assertEqual(jobs.retry_delay(20), timedelta(seconds=jobs.RETRY_MAX_DELAY))
+
+    def test_job_is_dead_lettered_after_last_attempt(self):
+        job = jobs.enqueue('tests.fail', max_attempts=1)
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'dead')
+        self.assertIsNone(job.locked_at)
+
+    def test_unknown_job_is_dead_lettered(self):
+        job = jobs.enqueue('tests.unknown', max_attempts=1)
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'dead')
+        self.assertIn('tests.unknown', job.last_error)
+
+    def test_stale_running_jobs_are_requeued(self):
+        stale = Job.objects.create(name='send_email', status='running', locked_at=timezone.now() - timedelta(hours=1))
+        active = Job.objects.create(name='send_email', status='running', locked_at=timezone.now())
+
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+
+        stale.refresh_from_db()
+        active.refresh_from_db()
+        self.assertEqual(stale.status, 'pending')
+        self.assertIsNone(stale.locked_at)
+        self.assertEqual(active.status, 'running')
+
+
+class JobClaimConcurrencyTests(TransactionTestCase):
+    def test_locked_jobs_are_skipped(self):
+        locked = jobs.enqueue('send_email')
+        free = jobs.enqueue('send_email')
+        acquired = threading.Event()
+        release = threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    Job.objects.select_for_update().get(pk=locked.pk)
+                    acquired.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        try:
+            self.assertTrue(acquired.wait(10))
+            claimed = jobs.claim_jobs(10)
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual([job.pk for job in claimed], [free.pk])
+        locked.refresh_from_db()
+        self.assertEqual(locked.status, 'pending')
+
+
+@skipIf(fakeredis is None, "fakeredis o'rnatilmagan")
+@override_settings(CACHES=FAKE_REDIS_CACHES)
+class SharedCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self, value='yangi'):
+        self.calls += 1
+        return value
+
+    def test_value_is_computed_once_and_cached(self):
+        self.assertEqual(get_or_compute('kalit', self.compute, 60), 'yangi')
+        self.assertEqual(get_or_compute('kalit', self.compute, 60), 'yangi')
+        self.assertEqual(self.calls, 1)
+        self.assertIsNone(cache.get('kalit:lock'))
+
+    def test_none_is_cached(self):
+        get_or_compute('kalit', lambda: self.compute(None), 60)
+        self.assertIsNone(get_or_compute('kalit', lambda: self.compute(None), 60))
+        self.assertEqual(self.calls, 1)
+
+    def test_lock_holder_is_not_stampeded_and_stale_value_is_served(self):
+        cache.set('kalit', ('eski', 1.0, time.time() - 1), 60)
+        cache.add('kalit:lock', 1, 30)
+        self.assertEqual(get_or_compute('kalit', self.compute, 60), 'eski')
+        self.assertEqual(self.calls, 0)
+
+    def test_waiter_without_value_computes_after_lock_wait(self):
+        cache.add('kalit:lock', 1, 30)
+        with mock.patch('common.cache.LOCK_WAIT', 0.1):
+            self.assertEqual(get_or_compute('kalit', self.compute, 60), 'yangi')
+        self.assertEqual(self.calls, 1)
+        # Begona qulf o'chirilmaydi
+        self.assertEqual(cache.get('kalit:lock'), 1)
+
+    def test_concurrent_callers_compute_once(self):
+        def slow():
+            time.sleep(0.2)
+            return self.compute()
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_or_compute('kalit', slow, 60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['yangi'] * 8)
+        self.assertEqual(self.calls, 1)
+
+    def test_early_recompute_near_expiry(self):
+        # Hisoblash 10 soniya davom etgan, muddat tugashiga 30 soniya qolgan
+        cache.set('kalit', ('eski', 10.0, time.time() + 30), 60)
+        with mock.patch('common.cache.random.random', return_value=0.0):
+            # -log(1) = 0: muddatidan oldin yangilanmaydi
+            self.assertEqual(get_or_compute('kalit', self.compute, 60), 'eski')
+        with mock.patch('common.cache.random.random', return_value=0.999):
+            # -log(0.001) * 10 ≈ 69 s > 30 s: erta yangilanadi
+            self.assertEqual(get_or_compute('kalit', self.compute, 60), 'yangi')
+        self.assertEqual(self.calls, 1)
+
+    def test_lock_is_released_when_compute_fails(self):
+        def failing():
+            raise RuntimeError('xato')
+
+        with self.assertRaises(RuntimeError):
+            get_or_compute('kalit', failing, 60)
+        self.assertIsNone(cache.get('kalit:lock'))
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=location)
+
+    def refcount(self, name):
+        return StoredBlob.objects.get(name=name).refcount
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.storage.save('a.jpg', ContentFile(b'rasm'))
+        second = self.storage.save('b.JPG', ContentFile(b'rasm'))
+        other = self.storage.save('c.jpg', ContentFile(b'boshqa'))
+
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith('blobs/'))
+        self.assertNotEqual(first, other)
+        self.assertEqual(self.refcount(first), 2)
+        self.assertEqual(self.refcount(other), 1)
+        with self.storage.open(first) as fh:
+            self.assertEqual(fh.read(), b'rasm')
+        # Vaqtinchalik fayllar qolmaydi
+        self.assertEqual(os.listdir(os.path.dirname(self.storage.path(first))), [os.path.basename(first)])
+
+    def test_delete_decrements_refcount_and_keeps_file(self):
+        name = self.storage.save('a.jpg', ContentFile(b'rasm'))
+        self.storage.save('b.jpg', ContentFile(b'rasm'))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.storage.delete(name)
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.refcount(name), 1)
+        self.assertTrue(self.storage.exists(name))
+
+    def test_last_reference_removes_file_after_commit(self):
+        name = self.storage.save('a.jpg', ContentFile(b'rasm'))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.storage.delete(name)
+            self.assertTrue(self.storage.exists(name))
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(StoredBlob.objects.filter(name=name).exists())
+        self.assertFalse(self.storage.exists(name))
+
+    def test_recreated_blob_survives_pending_unlink(self):
+        name = self.storage.save('a.jpg', ContentFile(b'rasm'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.storage.delete(name)
+
+        # O'chirish navbatda turganda xuddi shu mazmun qayta yuklanadi
+        self.assertEqual(self.storage.save('b.jpg', ContentFile(b'rasm')), name)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(self.refcount(name), 1)
+        self.assertTrue(self.storage.exists(name))
+
+    def test_missing_file_is_rewritten_for_existing_blob(self):
+        name = self.storage.save('a.jpg', ContentFile(b'rasm'))
+        os.remove(self.storage.path(name))
+
+        self.storage.save('b.jpg', ContentFile(b'rasm'))
+
+        self.assertEqual(self.refcount(name), 2)
+        self.assertTrue(self.storage.exists(name))
+
+    def test_untracked_file_is_deleted_directly(self):
+        legacy = self.storage.path('complaint_images/eski.jpg')
+        os.makedirs(os.path.dirname(legacy))
+        with open(legacy, 'wb') as fh:
+            fh.write(b'eski')
+
+        self.storage.delete('complaint_images/eski.jpg')
+
+        self.assertFalse(os.path.exists(legacy))
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        self.registry = Registry()
+        patcher = mock.patch('common.middleware.registry', self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.request = RequestFactory().get('/home/')
+
+    def run_middleware(self, view):
+        return RequestMetricsMiddleware(view)(self.request)
+
+    def count_regions_twice(self, request):
+        Region.objects.count()
+        Region.objects.count()
+        return HttpResponse('ok')
+
+    def test_server_timing_reports_queries_and_duplicates(self):
+        response = self.run_middleware(self.count_regions_twice)
+
+        timing = response['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="2 queries, 1 duplicates"', timing)
+        self.assertEqual(self.registry.queries.series['<unresolved>'][2], 1)
+        self.assertEqual(self.registry.duplicate_queries.series, {'<unresolved>': 1})
+
+    @override_settings(METRICS_QUERY_BUDGET=1)
+    def test_query_budget_violation_is_logged(self):
+        with self.assertLogs('common.middleware', 'WARNING') as logs:
+            self.run_middleware(self.count_regions_twice)
+
+        self.assertIn('GET /home/', logs.output[0])
+        self.assertIn('2 SQL (1 takroriy', logs.output[0])
+        self.assertEqual(self.registry.budget_violations.series, {'<unresolved>': 1})
+
+    def test_streaming_queries_are_counted_when_consumed(self):
+        def rows():
+            yield str(Region.objects.count())
+            yield str(Region.objects.count())
+
+        response = self.run_middleware(lambda request: StreamingHttpResponse(rows()))
+        self.assertEqual(self.registry.queries.series, {})
+
+        self.assertEqual(b''.join(response.streaming_content), b'00')
+        counts, _total, count = self.registry.queries.series['<unresolved>']
+        self.assertEqual(count, 1)
+        # 2 so'rov `le="2"` bakiga tushadi
+        self.assertEqual(counts[1], 1)
+        self.assertEqual(self.registry.duplicate_queries.series, {'<unresolved>': 1})
+
+
+class MetricsRenderTests(SimpleTestCase):
+    def test_prometheus_text_format(self):
+        registry = Registry()
+        registry.record('home', 0.03, 0.01, 3, 1, template_duration=0.02)
+        registry.record('home', 2.0, 0.5, 120, 0, over_budget=True)
+
+        lines = registry.render().splitlines()
+
+        self.assertIn('# TYPE http_request_duration_seconds histogram', lines)
+        self.assertIn('http_request_duration_seconds_bucket{view="home",le="0.025"} 0', lines)
+        self.assertIn('http_request_duration_seconds_bucket{view="home",le="0.05"} 1', lines)
+        self.assertIn('http_request_duration_seconds_bucket{view="home",le="+Inf"} 2', lines)
+        self.assertIn('http_request_duration_seconds_sum{view="home"} 2.03', lines)
+        self.assertIn('http_request_duration_seconds_count{view="home"} 2', lines)
+        self.assertIn('http_request_db_queries_bucket{view="home",le="5"} 1', lines)
+        self.assertIn('http_request_db_queries_bucket{view="home",le="500"} 2', lines)
+        self.assertIn('http_request_template_duration_seconds_count{view="home"} 1', lines)
+        self.assertIn('# TYPE http_request_db_duplicate_queries_total counter', lines)
+        self.assertIn('http_request_db_duplicate_queries_total{view="home"} 1', lines)
+        self.assertIn('http_request_budget_violations_total{view="home"} 1', lines)
+
+    def test_labels_are_escaped(self):
+        registry = Registry()
+        registry.record('a"b\\c', 0.01, 0.0, 1, 0)
+        self.assertIn('view="a\\"b\\\\c"', registry.render())
+
+
+class MetricsViewAuthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('fuqaro', password='parol123', role='user')
+        cls.staff = CustomUser.objects.create_user('xodim', password='parol123', role='admin', is_staff=True)
+
+    @override_settings(METRICS_TOKEN='maxfiy')
+    def test_token_is_required_when_configured(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer notogri'})
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer maxfiy'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    @override_settings(METRICS_TOKEN='')
+    def test_staff_only_without_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+
+class AdminCountAnnotationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'parol123')
+        cls.citizen = CustomUser.objects.create_user('fuqaro', password='parol123')
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def create_region(self, index):
+        region = Region.objects.create(name=f'Viloyat {index}')
+        districts = [District.objects.create(name=f'Tuman {index}-{n}', region=region) for n in range(index % 3 + 1)]
+        for district in districts:
+            organization = Tashkilot.objects.create(
+                name=f'{district.name} hokimligi', manzil='', telefon='', email='', hudud=district,
+            )
+            for _ in range(index % 4):
+                Complaint.objects.create(
+                    title='Chiqindi', description="Ko'chada chiqindi", region=region, district=district,
+                    user=self.citizen, masul_tashkilot=organization,
+                )
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        urls = [reverse(f'admin:common_{name}_changelist') for name in ('region', 'district', 'tashkilot')]
+        self.create_region(1)
+        baseline = {}
+        for url in urls:
+            # Birinchi so'rov jarayon keshlarini (ContentType va h.k.) to'ldiradi
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            baseline[url] = len(queries)
+
+        for index in range(2, 8):
+            self.create_region(index)
+        for url in urls:
+            with self.subTest(url=url), self.assertNumQueries(baseline[url]):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_annotated_counts_match_related_counts(self):
+        for index in range(1, 6):
+            self.create_region(index)
+        empty = Region.objects.create(name="Bo'sh viloyat")
+        request = RequestFactory().get('/')
+        request.user = self.admin_user
+
+        regions = admin.site._registry[Region].get_queryset(request)
+        for region in regions:
+            self.assertEqual(region.districts_count, region.districts.count())
+            self.assertEqual(region.organizations_count, Tashkilot.objects.filter(hudud__region=region).count())
+        self.assertEqual((regions.get(pk=empty.pk).districts_count, regions.get(pk=empty.pk).organizations_count), (0, 0))
+
+        for district in admin.site._registry[District].get_queryset(request):
+            self.assertEqual(district.organizations_count, Tashkilot.objects.filter(hudud=district).count())
+
+        counts = [
+            (organization.complaints_count, Complaint.objects.filter(masul_tashkilot=organization).count())
+            for organization in admin.site._registry[Tashkilot].get_queryset(request)
+        ]
+        self.assertTrue(any(expected for _count, expected in counts))
+        for count, expected in counts:
+            self.assertEqual(count, expected)
@@ -0,0 +1,30 @@
+"""
+O'zbek matnini qidiruv uchun bir xil ko'rinishga keltirish.
+
+Murojaatlar lotin va kirill yozuvlarida yoziladi, shuning uchun indekslashdan
+va qidirishdan oldin matn lotin yozuviga o'giriladi, tutuq belgilari
+(ʻ ʼ ’ ` va h.k.) bittasiga keltiriladi va kichik harflarga o'tkaziladi.
+"""
+import re
+
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'j', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'x', 'ц': 's', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': "'",
+    'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya', 'ў': "o'", 'қ': 'q',
+    'ғ': "g'", 'ҳ': 'h',
+}
+
+APOSTROPHES = re.compile(r"[ʻʼ’‘`´]")
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_uz(text):
+    """Matnni kichik harfli lotin yozuviga o'giradi"""
+    if not text:
+        return ''
+    text = text.lower()
+    text = ''.join(CYRILLIC_TO_LATIN.get(char, char) for char in text)
+    text = APOSTROPHES.sub("'", text)
+    return WHITESPACE.sub(' ', text).strip()
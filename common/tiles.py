@@ -0,0 +1,181 @@
+"""
+Murojaatlar uchun vektor tayllar (Mapbox Vector Tile) va ularning fayl keshi.
+
+Tayllar PostGIS ``ST_AsMVT`` orqali yaratiladi va ``TILE_CACHE_DIR`` ichida
+``<filtr xeshi>/<z>/<x>/<y>.pbf`` ko'rinishida saqlanadi. Murojaat
+yaratilganda yoki o'zgarganda faqat u tushadigan tayllar o'chiriladi.
+"""
+import hashlib
+import logging
+import math
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+TILE_MIN_ZOOM = 0
+TILE_MAX_ZOOM = 18
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+# Tayllarni filtrlash mumkin bo'lgan parametrlar
+TILE_FILTERS = ('region', 'district', 'status', 'priority')
+
+
+def cache_dir():
+    return settings.TILE_CACHE_DIR
+
+
+def filter_key(filters):
+    """Normallashtirilgan filtrlardan (common.views.parse_map_filters) barqaror qisqa xesh yasaydi"""
+    parts = [
+        f'{name}={filters[name]}'
+        for name in TILE_FILTERS
+        if name in filters
+    ]
+    if not parts:
+        return 'all'
+    return hashlib.sha1('&'.join(parts).encode()).hexdigest()[:12]
+
+
+def tile_path(key, z, x, y):
+    return os.path.join(cache_dir(), key, str(z), str(x), f'{y}.pbf')
+
+
+def read_tile(key, z, x, y):
+    try:
+        with open(tile_path(key, z, x, y), 'rb') as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_tile(key, z, x, y, data):
+    path = tile_path(key, z, x, y)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Yarim yozilgan faylni boshqa worker o'qib qolmasligi uchun avval vaqtinchalik faylga yozamiz
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(data)
+    os.replace(tmp_path, path)
+
+
+def render_tile(z, x, y, filters):
+    """Taylni ST_AsMVT orqali ma'lumotlar bazasida yaratadi"""
+    from complaints.models import Complaint
+    from common.models import District, Region
+
+    status_cases = ' '.join('WHEN %s THEN %s' for _ in Complaint.STATUS_CHOICES)
+    status_params = [item for choice in Complaint.STATUS_CHOICES for item in choice]
+
+    where = []
+    where_params = []
+    for name, column in (
+        ('region', 'c.region_id'),
+        ('district', 'c.district_id'),
+        ('status', 'c.status'),
+        ('priority', 'c.priority'),
+    ):
+        if name in filters:
+            where.append(f'{column} = %s')
+            where_params.append(filters[name])
+
+    sql = f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s, margin => %s) AS geom
+        ),
+        mvtgeom AS (
+            SELECT
+                ST_AsMVTGeom(ST_Transform(c.location, 3857), ST_TileEnvelope(%s, %s, %s), %s, %s, true) AS geom,
+                c.id,
+                c.title,
+                c.priority,
+                c.status,
+                CASE c.status {status_cases} ELSE c.status END AS status_label,
+                COALESCE(r.name, '') AS region,
+                COALESCE(d.name, '') AS district
+            FROM {Complaint._meta.db_table} c
+            JOIN bounds ON c.location && ST_Transform(bounds.geom, 4326)
+            LEFT JOIN {Region._meta.db_table} r ON r.id = c.region_id
+            LEFT JOIN {District._meta.db_table} d ON d.id = c.district_id
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+        )
+        SELECT ST_AsMVT(mvtgeom, 'complaints', %s, 'geom') FROM mvtgeom
+    """
+    sql_params = [
+        z, x, y, TILE_BUFFER / TILE_EXTENT,
+        z, x, y, TILE_EXTENT, TILE_BUFFER,
+        *status_params,
+        *where_params,
+        TILE_EXTENT,
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, sql_params)
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] else b''
+
+
+def get_tile(z, x, y, filters):
+    """
+    Taylni keshdan oladi, bo'lmasa yaratib keshga yozadi.
+    `filters` oldindan tekshirilgan bo'lishi kerak - har bir filtr to'plami uchun
+    diskda alohida katalog ochiladi.
+    """
+    key = filter_key(filters)
+    data = read_tile(key, z, x, y)
+    if data is None:
+        data = render_tile(z, x, y, filters)
+        write_tile(key, z, x, y, data)
+    return data
+
+
+def tiles_for_point(lng, lat):
+    """Nuqta (bufer bilan birga) tushadigan barcha tayllar"""
+    lat = max(min(lat, 85.0511), -85.0511)
+    margin = TILE_BUFFER / TILE_EXTENT
+    tiles = set()
+    for z in range(TILE_MIN_ZOOM, TILE_MAX_ZOOM + 1):
+        n = 2 ** z
+        fx = (lng + 180.0) / 360.0 * n
+        fy = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n
+        xs = {int(fx - margin), int(fx), int(fx + margin)}
+        ys = {int(fy - margin), int(fy), int(fy + margin)}
+        for x in xs:
+            for y in ys:
+                if 0 <= x < n and 0 <= y < n:
+                    tiles.add((z, x, y))
+    return tiles
+
+
+def invalidate_points(points):
+    """Berilgan nuqtalar tushadigan tayllarni barcha filtr keshlaridan o'chiradi"""
+    tiles = set()
+    for point in points:
+        if point is not None:
+            tiles |= tiles_for_point(point.x, point.y)
+    if not tiles:
+        return
+
+    try:
+        keys = [entry.name for entry in os.scandir(cache_dir()) if entry.is_dir()]
+    except FileNotFoundError:
+        return
+
+    for key in keys:
+        for z, x, y in tiles:
+            try:
+                os.remove(tile_path(key, z, x, y))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                logger.exception("Taylni keshdan o'chirib bo'lmadi: %s/%s/%s/%s", key, z, x, y)
+
+
+def clear_cache():
+    """Butun tayl keshini tozalaydi"""
+    shutil.rmtree(cache_dir(), ignore_errors=True)
@@ -1,8 +1,12 @@
 from django.urls import path
 from django.views.generic import RedirectView
-from .views import home_view
+from .views import home_view, map_points_view, map_clusters_view, complaint_tile_view, metrics_view
 
 urlpatterns = [
     path("", RedirectView.as_view(url="home/", permanent=True)),
     path('home/', home_view, name='home'),
+    path('home/map/points/', map_points_view, name='map_points'),
+    path('home/map/clusters/', map_clusters_view, name='map_clusters'),
+    path('tiles/complaints/<int:z>/<int:x>/<int:y>.pbf', complaint_tile_view, name='complaint_tile'),
+    path('metrics', metrics_view, name='metrics'),
 ]
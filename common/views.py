@@ -1,64 +1,302 @@
 import json
+import math
 from django.shortcuts import render
 from django.views import View
-from django.db.models import Count
-from .models import Region, District
+from django.db.models import Count, Q
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.contrib.gis.geos import Polygon
+from django.contrib.gis.db.models import Collect
+from django.contrib.gis.db.models.functions import Centroid, SnapToGrid
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from . import metrics, reference, tiles
+from .cache import get_or_compute, make_key
 from complaints.models import Complaint
 
+# Bitta so'rovda qaytariladigan nuqtalarning yuqori chegarasi
+MAP_POINTS_LIMIT = 5000
+MAP_MAX_ZOOM = 19
+# Shu zoom darajasidan boshlab klaster emas, alohida nuqtalar qaytariladi
+MAP_CLUSTER_MAX_ZOOM = 14
+# Klaster katakchasining ekrandagi o'lchami (piksel)
+MAP_CLUSTER_CELL_PX = 64
+# Xarita javoblari umumiy keshda saqlanadigan vaqt (soniya)
+MAP_CACHE_TIMEOUT = 30
+
+
 # Create your views here.
 class DashboardView(View):
     def get(self, request):
         return render(request, 'dashboard.html')
 
+
+def _parse_bbox(value):
+    """'min_lng,min_lat,max_lng,max_lat' ko'rinishidagi bbox ni Polygon ga aylantiradi"""
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        return None
+    # float() 'nan' va 'inf' ni ham qabul qiladi - ular taqqoslashlardan o'tib ketadi
+    if not all(math.isfinite(value) for value in (min_lng, min_lat, max_lng, max_lat)):
+        return None
+    if min_lng >= max_lng or min_lat >= max_lat:
+        return None
+    bbox = Polygon.from_bbox((
+        max(min_lng, -180.0), max(min_lat, -90.0),
+        min(max_lng, 180.0), min(max_lat, 90.0),
+    ))
+    bbox.srid = 4326
+    return bbox
+
+
+def _parse_zoom(value):
+    try:
+        zoom = int(value)
+    except (TypeError, ValueError):
+        return None
+    if 0 <= zoom <= MAP_MAX_ZOOM:
+        return zoom
+    return None
+
+
+def _coordinate_precision(zoom):
+    """Zoom darajasida bitta pikselni ajratish uchun yetarli kasr xonalari soni"""
+    return max(2, math.ceil(math.log10(256 * 2 ** zoom / 360)))
+
+
+def parse_map_filters(params):
+    """
+    Xarita filtrlarini (region/district/status/priority) tekshiradi va normallashtiradi.
+    Qiymatlardan biri noto'g'ri bo'lsa None qaytaradi.
+    """
+    filters = {}
+    for name in ('region', 'district'):
+        value = params.get(name)
+        if value:
+            try:
+                filters[name] = int(value)
+            except ValueError:
+                return None
+    for name, choices in (('status', Complaint.STATUS_CHOICES), ('priority', Complaint.PRIORITY_CHOICES)):
+        value = params.get(name)
+        if value:
+            if value not in dict(choices):
+                return None
+            filters[name] = value
+    return filters
+
+
+def filter_map_complaints(filters):
+    """Xarita uchun region/district/status/priority filtrlari (parse_map_filters natijasi)"""
+    complaints = Complaint.objects.filter(location__isnull=False)
+
+    if 'region' in filters:
+        complaints = complaints.filter(region_id=filters['region'])
+    if 'district' in filters:
+        complaints = complaints.filter(district_id=filters['district'])
+    if 'status' in filters:
+        complaints = complaints.filter(status=filters['status'])
+    if 'priority' in filters:
+        complaints = complaints.filter(priority=filters['priority'])
+    return complaints
+
+
+def _map_points(complaints, bbox, zoom):
+    """Ko'rinib turgan hududdagi alohida nuqtalar"""
+    # `&&` operatori location ustidagi GiST indeksidan foydalanadi
+    rows = complaints.filter(
+        location__bboverlaps=bbox,
+    ).order_by('-created_at').values_list(
+        'id', 'title', 'location', 'priority', 'status', 'region__name', 'district__name',
+    )[:MAP_POINTS_LIMIT + 1]
+
+    precision = _coordinate_precision(zoom)
+    status_labels = dict(Complaint.STATUS_CHOICES)
+    points = [
+        {
+            'id': pk,
+            'title': title,
+            'lat': round(location.y, precision),
+            'lng': round(location.x, precision),
+            'priority': priority,
+            'status': status_labels.get(status, status),
+            'region': region or '',
+            'district': district or '',
+        }
+        for pk, title, location, priority, status, region, district in rows
+    ]
+
+    return {
+        'type': 'points',
+        'zoom': zoom,
+        'truncated': len(points) > MAP_POINTS_LIMIT,
+        'points': points[:MAP_POINTS_LIMIT],
+    }
+
+
+def _map_clusters(complaints, bbox, zoom):
+    """Nuqtalarni PostGIS ichida zoom darajasiga mos panjara kataklariga guruhlaydi"""
+    cell_size = 360 / 2 ** zoom * MAP_CLUSTER_CELL_PX / 256
+
+    priorities = [value for value, _label in Complaint.PRIORITY_CHOICES]
+    statuses = [value for value, _label in Complaint.STATUS_CHOICES]
+
+    breakdown = {}
+    for value in priorities:
+        breakdown[f'priority_{value}'] = Count('id', filter=Q(priority=value))
+    breakdown['priority_none'] = Count('id', filter=Q(priority__isnull=True))
+    for value in statuses:
+        breakdown[f'status_{value}'] = Count('id', filter=Q(status=value))
+
+    rows = complaints.filter(
+        location__bboverlaps=bbox,
+    ).annotate(
+        cell=SnapToGrid('location', cell_size),
+    ).values('cell').annotate(
+        count=Count('id'),
+        center=Centroid(Collect('location')),
+        **breakdown,
+    ).order_by()
+
+    precision = _coordinate_precision(zoom)
+    clusters = []
+    for row in rows:
+        clusters.append({
+            'lat': round(row['center'].y, precision),
+            'lng': round(row['center'].x, precision),
+            'count': row['count'],
+            'priority': {key: row[f'priority_{key}'] for key in priorities + ['none']},
+            'status': {key: row[f'status_{key}'] for key in statuses},
+        })
+
+    return {
+        'type': 'clusters',
+        'zoom': zoom,
+        'clusters': clusters,
+    }
+
+
+def _parse_viewport(request):
+    bbox = _parse_bbox(request.GET.get('bbox'))
+    zoom = _parse_zoom(request.GET.get('zoom'))
+    filters = parse_map_filters(request.GET)
+    if bbox is None or zoom is None or filters is None:
+        return None
+    return bbox, zoom, filters
+
+
+def _cached_map_response(kind, filters, bbox, zoom, build):
+    """Bir xil ko'rinish (filtrlar, zoom, bbox) uchun javob umumiy keshdan beriladi"""
+    # bbox zoom aniqligida yaxlitlanadi: bir piksel ichidagi siljishlar bitta kalitga tushadi
+    precision = _coordinate_precision(zoom)
+    extent = ','.join(f'{value:.{precision}f}' for value in bbox.extent)
+    key = make_key(f'map:{kind}', zoom, extent, **filters)
+    return JsonResponse(get_or_compute(key, build, MAP_CACHE_TIMEOUT))
+
+
+def map_points_view(request):
+    """Xaritaning ko'rinib turgan qismidagi murojaatlarni JSON ko'rinishida qaytaradi"""
+    viewport = _parse_viewport(request)
+    if viewport is None:
+        return JsonResponse({'error': "bbox, zoom yoki filtr parametrlari noto'g'ri"}, status=400)
+
+    bbox, zoom, filters = viewport
+    return _cached_map_response(
+        'points', filters, bbox, zoom,
+        lambda: _map_points(filter_map_complaints(filters), bbox, zoom),
+    )
+
+
+def map_clusters_view(request):
+    """
+    Kichik zoomda klasterlar (markaz, soni, prioritet/holat bo'yicha taqsimot),
+    yetarlicha yaqinlashtirilganda esa alohida nuqtalar qaytaradi
+    """
+    viewport = _parse_viewport(request)
+    if viewport is None:
+        return JsonResponse({'error': "bbox, zoom yoki filtr parametrlari noto'g'ri"}, status=400)
+
+    bbox, zoom, filters = viewport
+    complaints = filter_map_complaints(filters)
+    if zoom >= MAP_CLUSTER_MAX_ZOOM:
+        return _cached_map_response(
+            'points', filters, bbox, zoom, lambda: _map_points(complaints, bbox, zoom),
+        )
+    return _cached_map_response(
+        'clusters', filters, bbox, zoom, lambda: _map_clusters(complaints, bbox, zoom),
+    )
+
+
+def _known_areas(filters):
+    if 'region' in filters and filters['region'] not in {item['id'] for item in reference.regions()}:
+        return False
+    if 'district' in filters and filters['district'] not in {item['id'] for item in reference.districts()}:
+        return False
+    return True
+
+
+def complaint_tile_view(request, z, x, y):
+    """Murojaatlar qatlami uchun Mapbox Vector Tile (keshdan yoki ST_AsMVT orqali)"""
+    if not (tiles.TILE_MIN_ZOOM <= z <= tiles.TILE_MAX_ZOOM) or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise Http404("Bunday tayl mavjud emas")
+
+    filters = parse_map_filters(request.GET)
+    # Tayl keshi har bir filtr to'plami uchun alohida - faqat mavjud hududlar qabul qilinadi
+    if filters is None or not _known_areas(filters):
+        return HttpResponseBadRequest("Filtr parametrlari noto'g'ri")
+
+    data = tiles.get_tile(z, x, y, filters)
+    response = HttpResponse(data, content_type='application/vnd.mapbox-vector-tile')
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
+
+
 def home_view(request):
     # 1. Filtrlash logikasi
-    complaints = Complaint.objects.all().order_by('-created_at')
-    
-    region_id = request.GET.get('region')
-    district_id = request.GET.get('district')
+    complaints = Complaint.objects.all()
+
+    # Noto'g'ri filtr qiymatlari e'tiborsiz qoldiriladi
+    filters = parse_map_filters(request.GET) or {}
+    region_id = filters.get('region')
+    district_id = filters.get('district')
 
     if region_id:
         complaints = complaints.filter(region_id=region_id)
     if district_id:
         complaints = complaints.filter(district_id=district_id)
 
-    # 2. Xarita uchun ma'lumotlarni tayyorlash
-    # Faqat lokatsiyasi bor murojaatlarni olamiz
-    map_data = []
-    for c in complaints:
-        if c.location:
-            map_data.append({
-                'id': c.id,
-                'title': c.title,
-                'lat': c.location.y, # Latitude
-                'lng': c.location.x, # Longitude
-                'priority': c.priority, # Rang uchun kerak (high, medium, low)
-                'status': c.get_status_display(),
-                'region': c.region.name if c.region else '',
-                'district': c.district.name if c.district else ''
-            })
+    # 2. Xarita nuqtalari sahifaga joylanmaydi - ular map_points_view orqali
+    # ko'rinib turgan hudud bo'yicha alohida yuklanadi
 
     # 3. Top 10 (Yuqori prioritetli)
     high_priority_complaints = Complaint.objects.filter(
         priority='high',
         status__in=['new', 'in_progress'],
+    ).select_related('region', 'district').defer(
+        'region__boundary', 'district__boundary',
     ).order_by('-created_at')[:10]
 
-    regions = Region.objects.all()
-    districts = District.objects.all()
+    districts = reference.districts()
 
     context = {
         'complaints_count': complaints.count(),
-        'map_data': json.dumps(map_data), # Xarita uchun JSON
         'top_complaints': high_priority_complaints,
-        'regions': regions,
+        'regions': reference.regions(),
         'districts': districts,
-        'selected_region': int(region_id) if region_id else None,
-        'selected_district': int(district_id) if district_id else None,
-        'districts_json': json.dumps([
-            {'id': d.id, 'name': d.name, 'region_id': d.region_id} 
-            for d in districts
-        ])  
+        'selected_region': region_id,
+        'selected_district': district_id,
+        'districts_json': json.dumps(districts),
     }
 
-    return render(request, 'home.html', context)
\ No newline at end of file
+    return render(request, 'home.html', context)
+
+
+def metrics_view(request):
+    """So'rov metrikalari Prometheus matn formatida (common/metrics.py)"""
+    token = settings.METRICS_TOKEN
+    if token:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse(status=401)
+    elif not request.user.is_staff:
+        return HttpResponse(status=403)
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
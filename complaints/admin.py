@@ -2,7 +2,10 @@ from django.contrib import admin
 from unfold.admin import ModelAdmin, TabularInline
 from unfold.decorators import display
 from django.utils.html import format_html
-from .models import Complaint, Image
+from django.db.models import Q
+from .models import BulkActionLog, Complaint, Image
+from users.models import CustomUser
+from common.pagination import EstimatedCountAdminMixin
 
 
 class ImageInline(TabularInline):
@@ -15,12 +18,12 @@ class ImageInline(TabularInline):
     @display(description="Rasm ko'rinishi")
     def image_preview(self, obj):
         if obj.img:
-            return format_html('<img src="{}" style="max-height: 100px; max-width: 150px; border-radius: 8px;" />', obj.img.url)
+            return format_html('<img src="{}" loading="lazy" style="max-height: 100px; max-width: 150px; border-radius: 8px;" />', obj.preview_url)
         return "—"
 
 
 @admin.register(Complaint)
-class ComplaintAdmin(ModelAdmin):
+class ComplaintAdmin(EstimatedCountAdminMixin, ModelAdmin):
     """Complaint Admin with Unfold styling"""
     
     list_display = ['title', 'display_user', 'display_region', 'display_status', 'display_priority', 'display_organization', 'created_at']
@@ -39,7 +42,7 @@ class ComplaintAdmin(ModelAdmin):
             'fields': ('region', 'district', 'location')
         }),
         ('Holat va prioritet', {
-            'fields': ('status', 'priority', 'masul_tashkilot')
+            'fields': ('status', 'priority', 'masul_tashkilot', 'duplicate_of')
         }),
         ('Javob', {
             'fields': ('answer_text',),
@@ -54,6 +57,7 @@ class ComplaintAdmin(ModelAdmin):
     readonly_fields = ['created_at', 'updated_at', 'viewed_at', 'closed_at']
     
     autocomplete_fields = ['user', 'masul_tashkilot']
+    raw_id_fields = ['duplicate_of']
     
     @display(description="Foydalanuvchi")
     def display_user(self, obj):
@@ -93,13 +97,23 @@ class ComplaintAdmin(ModelAdmin):
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related('user', 'region', 'district', 'masul_tashkilot')
+        return qs.for_listing()
+    
+    def get_search_results(self, request, queryset, search_term):
+        # ILIKE '%...%' o'rniga search_vector ustidagi GIN indeks va foydalanuvchi
+        # nomi/emaili bo'yicha aniq moslik ishlatiladi
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        users = CustomUser.objects.filter(Q(username=search_term) | Q(email=search_term))
+        matches = queryset.search(search_term).values('pk')
+        return queryset.filter(Q(pk__in=matches) | Q(user__in=users)), False
     
     list_per_page = 25
 
 
 @admin.register(Image)
-class ImageAdmin(ModelAdmin):
+class ImageAdmin(EstimatedCountAdminMixin, ModelAdmin):
     """Image Admin with Unfold styling"""
     
     list_display = ['id', 'display_complaint', 'image_preview', 'created_date']
@@ -118,8 +132,8 @@ class ImageAdmin(ModelAdmin):
     def image_preview(self, obj):
         if obj.img:
             return format_html(
-                '<img src="{}" style="max-height: 200px; max-width: 300px; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);" />',
-                obj.img.url
+                '<img src="{}" loading="lazy" style="max-height: 200px; max-width: 300px; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);" />',
+                obj.preview_url
             )
         return "—"
     
@@ -130,3 +144,20 @@ class ImageAdmin(ModelAdmin):
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         return qs.select_related('complaint', 'complaint__user')
+
+
+@admin.register(BulkActionLog)
+class BulkActionLogAdmin(ModelAdmin):
+    """Bulk triage audit log (read-only)"""
+    
+    list_display = ['created_at', 'user', 'action', 'value', 'affected']
+    list_filter = ['action', 'created_at']
+    search_fields = ['user__username', 'value']
+    ordering = ['-created_at']
+    readonly_fields = ['user', 'action', 'value', 'complaint_ids', 'filters', 'affected', 'created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,108 @@
+"""
+Murojaatlarga ommaviy amallar (prioritet, holat, mas'ul tashkilot).
+
+Har bir amal bitta `UPDATE ... RETURNING` bilan bajariladi: qaytgan eski/yangi
+qiymatlardan hisoblagich o'zgarishlari guruhlab qo'llanadi, o'zgargan nuqtalar
+tayl keshidan o'chiriladi va partiya uchun bitta BulkActionLog yozuvi qoldiriladi.
+"""
+from collections import Counter
+
+from django.contrib.gis.geos import Point
+from django.db import connection, transaction
+from django.utils import timezone
+
+from common import tiles
+from common.pagination import invalidate_facets
+from common.models import Tashkilot
+from .models import BulkActionLog, Complaint, ComplaintCounter
+
+# Shundan ko'p nuqta o'zgarsa tayllarni birma-bir o'chirishdan ko'ra keshni tozalash arzon
+TILE_CLEAR_THRESHOLD = 500
+
+# Ommaviy amalda ruxsat etilgan qiymatlar. Yopish javob matnini talab qiladi,
+# shuning uchun 'closed' holati faqat bitta murojaat sahifasida belgilanadi.
+# Yopilgan murojaatlar holati ham ommaviy o'zgartirilmaydi (closed_at va javob matni bilan
+# birga qayta ochish faqat bitta murojaat sahifasida).
+BULK_STATUSES = ('new', 'in_progress', 'rejected')
+BULK_PRIORITIES = ('low', 'medium', 'high')
+# Taylga yoziladigan maydonlar (complaints/signals.py TILE_FIELDS bilan mos)
+TILE_ACTIONS = ('status', 'priority')
+
+
+class BulkActionError(ValueError):
+    pass
+
+
+def clean_value(action, value):
+    """Amal qiymatini tekshiradi va bazaga yoziladigan ko'rinishga keltiradi"""
+    if action == 'priority' and value in BULK_PRIORITIES:
+        return value
+    if action == 'status' and value in BULK_STATUSES:
+        return value
+    if action == 'masul_tashkilot':
+        if value and str(value).isdigit() and Tashkilot.objects.filter(pk=value).exists():
+            return int(value)
+    raise BulkActionError(f"Noto'g'ri amal yoki qiymat: {action}={value}")
+
+
+def apply_bulk_action(queryset, action, value, user, complaint_ids=None, filters=None):
+    """
+    `queryset` dagi murojaatlarga `action` maydonini `value` ga o'rnatadi.
+    O'zgargan murojaatlar sonini qaytaradi.
+    """
+    value = clean_value(action, value)
+    if action == 'status':
+        queryset = queryset.exclude(status='closed')
+    column = Complaint._meta.get_field(action).column
+    table = Complaint._meta.db_table
+    # Qiymati allaqachon shunday bo'lgan qatorlarga tegilmaydi
+    pk_sql, pk_params = queryset.exclude(**{column: value}).order_by().values('pk').query.sql_with_params()
+    key_columns = ', '.join(f'c.{field}' for field in ComplaintCounter.KEY_FIELDS)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} c
+                SET {column} = %s, updated_at = %s
+                FROM (
+                    SELECT id, {column} AS old_value FROM {table}
+                    WHERE id IN ({pk_sql})
+                    FOR UPDATE
+                ) old
+                WHERE c.id = old.id
+                RETURNING old.old_value, ST_X(c.location), ST_Y(c.location), {key_columns}
+                """,
+                [value, timezone.now(), *pk_params],
+            )
+            rows = cursor.fetchall()
+
+        key_index = ComplaintCounter.KEY_FIELDS.index(column)
+        deltas = Counter()
+        points = []
+        for old_value, x, y, *key in rows:
+            deltas[tuple(key)] += 1
+            key[key_index] = old_value
+            deltas[tuple(key)] -= 1
+            if x is not None:
+                points.append(Point(x, y, srid=4326))
+        ComplaintCounter.objects.apply_deltas(deltas)
+
+        BulkActionLog.objects.create(
+            user=user,
+            action=action,
+            value=str(value),
+            complaint_ids=complaint_ids,
+            filters=filters,
+            affected=len(rows),
+        )
+
+        if rows:
+            transaction.on_commit(invalidate_facets)
+        if action in TILE_ACTIONS and points:
+            if len(points) > TILE_CLEAR_THRESHOLD:
+                transaction.on_commit(tiles.clear_cache)
+            else:
+                transaction.on_commit(lambda: tiles.invalidate_points(points))
+
+    return len(rows)
@@ -0,0 +1,67 @@
+"""
+Yangi murojaat uchun ehtimoliy takroriylarni topish.
+
+Nomzodlar avval `location` GiST indeksi orqali (ST_DWithin, gradusda) tanlanadi,
+keyin aniq masofa va sarlavha/tavsifning trigram o'xshashligi (pg_trgm `%`
+operatori, GIN indeks) bilan saralanadi. Topilgan takroriy murojaat klasterning
+asosiy (birinchi) murojaatiga bog'lanadi.
+"""
+import math
+
+from django.contrib.gis.measure import D
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Q
+from django.db.models.functions import Greatest
+
+from .models import Complaint
+
+DUPLICATE_RADIUS_METERS = 150
+DUPLICATE_CANDIDATES = 5
+OPEN_STATUSES = ('new', 'in_progress')
+METERS_PER_DEGREE = 111320
+
+
+def _radius_in_degrees(point, meters):
+    # Uzunlik gradusi kenglik oshgani sari qisqaradi, shuning uchun shu kenglikdagi
+    # eng katta qiymat olinadi - indeks filtri hech bir nomzodni tashlab ketmaydi
+    return meters / (METERS_PER_DEGREE * max(math.cos(math.radians(point.y)), 0.01))
+
+
+def find_duplicates(complaint, radius=DUPLICATE_RADIUS_METERS, limit=DUPLICATE_CANDIDATES):
+    """Yaqin atrofdagi ochiq va matni o'xshash murojaatlar, eng o'xshashi birinchi"""
+    point = complaint.location
+    if point is None:
+        return Complaint.objects.none()
+    return (
+        Complaint.objects
+        .filter(
+            status__in=OPEN_STATUSES,
+            location__dwithin=(point, _radius_in_degrees(point, radius)),
+        )
+        .filter(location__distance_lte=(point, D(m=radius)))
+        .filter(
+            Q(title__trigram_similar=complaint.title)
+            | Q(description__trigram_similar=complaint.description)
+        )
+        .exclude(pk=complaint.pk)
+        .annotate(similarity=Greatest(
+            TrigramSimilarity('title', complaint.title),
+            TrigramSimilarity('description', complaint.description),
+        ))
+        .order_by('-similarity', 'created_at')[:limit]
+    )
+
+
+def link_duplicate(complaint):
+    """
+    Murojaatni eng o'xshash ochiq murojaat klasteriga bog'laydi.
+    Topilgan murojaatni (yoki None) qaytaradi.
+    """
+    matches = list(find_duplicates(complaint, limit=1))
+    if not matches:
+        return None
+    match = matches[0]
+    complaint.duplicate_of_id = match.duplicate_of_id or match.pk
+    # save() emas - hisoblagich, qidiruv vektori va tile'larga ta'sir qilmaydi
+    Complaint.objects.filter(pk=complaint.pk).update(duplicate_of_id=complaint.duplicate_of_id)
+    return match
@@ -0,0 +1,219 @@
+"""
+Murojaatlarni CSV, XLSX va GeoJSON formatida oqim (streaming) bilan eksport qilish.
+
+Qatorlar server tomonidagi kursor orqali (`.iterator(chunk_size=...)`) bo'lak-bo'lak
+o'qiladi va darhol javobga yoziladi, shuning uchun xotira sarfi qatorlar soniga
+bog'liq emas. XLSX fayli ham zipfile yordamida oqim ko'rinishida yig'iladi.
+"""
+import csv
+import io
+import json
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Complaint
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = (
+    'id', 'title', 'description', 'status', 'priority', 'region__name', 'district__name',
+    'masul_tashkilot__name', 'user__username', 'created_at', 'closed_at', 'location',
+)
+EXPORT_HEADERS = (
+    'ID', 'Sarlavha', 'Tavsif', 'Holat', 'Prioritet', 'Viloyat', 'Tuman',
+    "Mas'ul tashkilot", 'Foydalanuvchi', 'Yaratilgan', 'Yopilgan', 'Kenglik', 'Uzunlik',
+)
+
+STATUS_LABELS = dict(Complaint.STATUS_CHOICES)
+PRIORITY_LABELS = dict(Complaint.PRIORITY_CHOICES)
+
+# XML 1.0 da ruxsat etilmagan boshqaruv belgilari
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _format_datetime(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+def export_rows(queryset):
+    """Eksport uchun qatorlar: (maydonlar lug'ati, Point yoki None)"""
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for (pk, title, description, status, priority, region, district,
+         organization, username, created_at, closed_at, location) in rows:
+        yield {
+            'id': pk,
+            'title': title,
+            'description': description,
+            'status': STATUS_LABELS.get(status, status),
+            'priority': PRIORITY_LABELS.get(priority, ''),
+            'region': region or '',
+            'district': district or '',
+            'organization': organization or '',
+            'user': username,
+            'created_at': _format_datetime(created_at),
+            'closed_at': _format_datetime(closed_at),
+        }, location
+
+
+# Excel bu belgilardan boshlangan katakni formula deb bajaradi (CSV injection)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_safe(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _table_row(fields, location, escape_formulas=False):
+    """
+    Jadval qatori. `escape_formulas=True` da (CSV uchun) fuqarolar kiritgan matn
+    formula sifatida ochilmasligi uchun `'` bilan boshlanadi; XLSX'da matn
+    kataklari formula emas, shuning uchun u yerda kerak emas.
+    """
+    values = [
+        *fields.values(),
+        location.y if location else '',
+        location.x if location else '',
+    ]
+    if escape_formulas:
+        values = [_csv_safe(value) for value in values]
+    return values
+
+
+class _Echo:
+    """csv.writer yozgan qatorni saqlamasdan qaytaradi"""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(queryset):
+    writer = csv.writer(_Echo())
+    # Excel UTF-8 faylni to'g'ri ochishi uchun BOM
+    yield '\ufeff' + writer.writerow(EXPORT_HEADERS)
+    for fields, location in export_rows(queryset):
+        yield writer.writerow(_table_row(fields, location, escape_formulas=True))
+
+
+def geojson_stream(queryset):
+    yield '{"type": "FeatureCollection", "features": ['
+    separator = ''
+    for fields, location in export_rows(queryset):
+        geometry = {'type': 'Point', 'coordinates': [location.x, location.y]} if location else None
+        feature = {'type': 'Feature', 'geometry': geometry, 'properties': fields}
+        yield separator + json.dumps(feature, ensure_ascii=False)
+        separator = ','
+    yield ']}'
+
+
+class _StreamBuffer(io.RawIOBase):
+    """zipfile yozgan baytlarni yig'adi; `drain()` ularni olib tashlaydi"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Murojaatlar" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if isinstance(value, (int, float)):
+            cells.append(f'<c t="n"><v>{value}</v></c>')
+        else:
+            text = escape(INVALID_XML_CHARS.sub('', str(value)))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return ('<row>' + ''.join(cells) + '</row>').encode()
+
+
+def xlsx_stream(queryset):
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(EXPORT_HEADERS))
+            for index, (fields, location) in enumerate(export_rows(queryset), start=1):
+                sheet.write(_xlsx_row(_table_row(fields, location)))
+                if index % EXPORT_CHUNK_SIZE == 0:
+                    yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+EXPORT_FORMATS = {
+    'csv': (csv_stream, 'text/csv; charset=utf-8', 'csv'),
+    'xlsx': (
+        xlsx_stream,
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'xlsx',
+    ),
+    'geojson': (geojson_stream, 'application/geo+json', 'geojson'),
+}
+
+
+def export_response(queryset, export_format):
+    stream, content_type, extension = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(stream(queryset), content_type=content_type)
+    filename = f"murojaatlar-{timezone.localdate():%Y%m%d}.{extension}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -1,8 +1,15 @@
 from django import forms
 from django.contrib.auth.models import User
 from .models import Complaint, Image
-from common.models import Region, District, Tashkilot
+from common.models import Tashkilot
 from users.models import CustomUser
+from common import reference
+from common.boundaries import locate
+
+
+def use_reference_choices(field, name):
+    """ModelChoiceField variantlarini har safar so'ramasdan ma'lumotnoma keshidan oladi"""
+    field.choices = reference.choices(name, empty_label=field.empty_label)
 
 
 class ComplaintCreateForm(forms.ModelForm):
@@ -30,6 +37,27 @@ class ComplaintCreateForm(forms.ModelForm):
                 'readonly': 'readonly',
             }),
         }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Majburiylik clean() da tekshiriladi - lokatsiya chegaralardan aniqlansa, tanlash shart emas
+        self.fields['region'].required = False
+        self.fields['district'].required = False
+        use_reference_choices(self.fields['region'], 'regions')
+        use_reference_choices(self.fields['district'], 'districts')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        region_id, district_id = locate(cleaned_data.get('location'))
+        if region_id is not None and district_id is not None:
+            # Viloyat va tuman saqlash paytida nuqtadan olinadi (Complaint.assign_boundaries)
+            return cleaned_data
+        for name in ('region', 'district'):
+            if not cleaned_data.get(name) and name not in self.errors:
+                self.add_error(name, forms.ValidationError(
+                    self.fields[name].error_messages['required'], code='required',
+                ))
+        return cleaned_data
 
 
 class ComplaintAdminUpdateForm(forms.ModelForm):
@@ -49,6 +77,10 @@ class ComplaintAdminUpdateForm(forms.ModelForm):
                 'placeholder': 'Javob matni...'
             }),
         }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        use_reference_choices(self.fields['masul_tashkilot'], 'organizations')
 
 
 class ComplaintModeratorUpdateForm(forms.ModelForm):
@@ -116,6 +148,10 @@ class TashkilotForm(forms.ModelForm):
             }),
             'hudud': forms.Select(attrs={'class': 'form-control'}),
         }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        use_reference_choices(self.fields['hudud'], 'districts')
 
 
 class UserCreateForm(forms.ModelForm):
@@ -164,6 +200,10 @@ class UserCreateForm(forms.ModelForm):
             }),
         }
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        use_reference_choices(self.fields['organization'], 'organizations')
+    
     def clean_password_confirm(self):
         password = self.cleaned_data.get('password')
         password_confirm = self.cleaned_data.get('password_confirm')
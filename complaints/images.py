@@ -0,0 +1,108 @@
+"""
+Murojaat rasmlarini qayta ishlash: EXIF ma'lumotlarini olib tashlash,
+o'lchamini cheklash, kichik nusxa (thumbnail) va WebP variantlarini yaratish.
+"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image as PILImage, ImageOps
+
+# Asl rasmning eng katta tomoni (piksel)
+MAX_DIMENSION = 1600
+# Ro'yxat va galereyalardagi kichik nusxa o'lchami
+THUMBNAIL_SIZE = (320, 320)
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+# Rasm sifatida ochib bo'lmaydigan yoki juda katta fayllar uchun
+PROCESSING_ERRORS = (OSError, ValueError, PILImage.DecompressionBombError)
+
+
+def _encode(image, fmt, **options):
+    buffer = BytesIO()
+    # exif/icc parametrlari berilmagani uchun metadata faylga yozilmaydi
+    image.save(buffer, format=fmt, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def _flatten(image):
+    """JPEG alfa kanalni qo'llamaydi - shaffof joylarni oq fon bilan to'ldiramiz"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = PILImage.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _store(image, field_name, filename, content):
+    field = image._meta.get_field(field_name)
+    return field.storage.save(field.generate_filename(image, filename), content)
+
+
+def _release(image, names):
+    for field_name, name in names.items():
+        image._meta.get_field(field_name).storage.delete(name)
+
+
+def process_image(image):
+    """
+    `complaints.Image` obyektining asl faylini qayta ishlaydi va barcha
+    variantlarni modelga yozadi. Eski asl fayl saqlash joyidan o'chiriladi.
+
+    Variantlar avval saqlash joyiga yoziladi, maydonlar esa oxirida bitta shartli
+    UPDATE bilan almashtiriladi: xato bo'lsa yozilgan fayllar qaytarib beriladi,
+    rasmni boshqa worker allaqachon qayta ishlagan bo'lsa natija tashlab yuboriladi
+    (None qaytadi). Shuning uchun vazifani qayta bajarish xavfsiz.
+    """
+    source_name = image.img.name
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+
+    with image.img.open('rb') as fh:
+        with PILImage.open(fh) as source:
+            source.load()
+            # Telefon rasmlaridagi burilishni EXIF bo'yicha to'g'rilab, keyin EXIF'ni tashlab yuboramiz
+            picture = _flatten(ImageOps.exif_transpose(source))
+
+    picture.thumbnail((MAX_DIMENSION, MAX_DIMENSION), PILImage.LANCZOS)
+    thumbnail = picture.copy()
+    thumbnail.thumbnail(THUMBNAIL_SIZE, PILImage.LANCZOS)
+
+    variants = {
+        'img': (f'{stem}.jpg', _encode(picture, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)),
+        'img_webp': (f'{stem}.webp', _encode(picture, 'WEBP', quality=WEBP_QUALITY, method=6)),
+        'thumbnail': (f'{stem}.jpg', _encode(thumbnail, 'JPEG', quality=JPEG_QUALITY, optimize=True)),
+        'thumbnail_webp': (f'{stem}.webp', _encode(thumbnail, 'WEBP', quality=WEBP_QUALITY, method=6)),
+    }
+
+    saved = {}
+    try:
+        for field_name, (filename, content) in variants.items():
+            saved[field_name] = _store(image, field_name, filename, content)
+        with transaction.atomic():
+            updated = type(image)._default_manager.filter(
+                pk=image.pk, img=source_name,
+            ).exclude(processing_state='ready').update(
+                **saved,
+                width=picture.width,
+                height=picture.height,
+                processing_state='ready',
+            )
+            if updated:
+                # Xom yuklangan faylga endi havola yo'q (mazmun bo'yicha saqlashda bu havolalar sonini kamaytiradi)
+                image.img.storage.delete(source_name)
+    except Exception:
+        _release(image, saved)
+        raise
+
+    if not updated:
+        _release(image, saved)
+        return None
+
+    for field_name, name in saved.items():
+        getattr(image, field_name).name = name
+    image.width, image.height = picture.size
+    image.processing_state = 'ready'
+    return image
@@ -0,0 +1,81 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max, Min
+
+from common import tiles
+from common.models import District, Region
+from common.pagination import invalidate_facets
+from complaints.models import Complaint
+
+
+class Command(BaseCommand):
+    help = "Mavjud murojaatlarning viloyat/tumanini lokatsiya va chegaralar bo'yicha partiyalab to'ldiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=5000,
+            help="Bitta UPDATE qamrab oladigan id oralig'i",
+        )
+        parser.add_argument(
+            '--overwrite',
+            action='store_true',
+            help="Tumani tanlangan murojaatlarni ham qayta hisoblash",
+        )
+
+    def handle(self, *args, **options):
+        bounds = Complaint.objects.filter(location__isnull=False).aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            self.stdout.write("Lokatsiyasi bor murojaatlar yo'q")
+            return
+
+        complaints = Complaint._meta.db_table
+        only_missing = '' if options['overwrite'] else 'AND c.district_id IS NULL'
+        # Har bir nuqta GiST indeksi orqali o'zi tushgan tuman poligoniga bog'lanadi
+        district_sql = f"""
+            UPDATE {complaints} c
+            SET district_id = d.id, region_id = d.region_id, updated_at = NOW()
+            FROM {District._meta.db_table} d
+            WHERE c.id >= %s AND c.id < %s
+              AND c.location IS NOT NULL {only_missing}
+              AND ST_Covers(d.boundary, c.location)
+              AND (c.district_id IS DISTINCT FROM d.id OR c.region_id IS DISTINCT FROM d.region_id)
+        """
+        # Tuman chegarasi topilmasa - faqat viloyat (Complaint.assign_boundaries bilan bir xil)
+        region_sql = f"""
+            UPDATE {complaints} c
+            SET region_id = r.id,
+                district_id = CASE WHEN c.region_id = r.id THEN c.district_id END,
+                updated_at = NOW()
+            FROM {Region._meta.db_table} r
+            WHERE c.id >= %s AND c.id < %s
+              AND c.location IS NOT NULL {only_missing}
+              AND ST_Covers(r.boundary, c.location)
+              AND c.region_id IS DISTINCT FROM r.id
+              AND NOT EXISTS (
+                  SELECT 1 FROM {District._meta.db_table} d WHERE ST_Covers(d.boundary, c.location)
+              )
+        """
+
+        changed = 0
+        start = bounds['first']
+        while start <= bounds['last']:
+            end = start + options['batch']
+            # Har bir partiya alohida tranzaksiya - qulflar qisqa vaqt ushlanadi
+            with connection.cursor() as cursor:
+                cursor.execute(district_sql, [start, end])
+                changed += cursor.rowcount
+                cursor.execute(region_sql, [start, end])
+                changed += cursor.rowcount
+            self.stdout.write(f"{start}..{end - 1}: jami {changed} ta yangilandi")
+            start = end
+
+        if changed:
+            # Ommaviy UPDATE save() ni chetlab o'tadi - hisoblagichlar, tile'lar va admin facet'lari yangilanadi
+            call_command('rebuild_complaint_counters', stdout=self.stdout)
+            tiles.clear_cache()
+            invalidate_facets()
+
+        self.stdout.write(self.style.SUCCESS(f"Viloyat/tuman to'ldirildi: {changed} ta murojaat"))
@@ -0,0 +1,77 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from common.models import StoredBlob
+from common.storage import ContentAddressedStorage, file_digest
+from complaints.models import Image
+
+
+class Command(BaseCommand):
+    help = (
+        "Mavjud murojaat rasmlarini mazmun bo'yicha saqlashga (blobs/) ko'chiradi, "
+        "takroriy fayllarni bitta nusxaga birlashtiradi va tejalgan hajmni ko'rsatadi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Faqat hisoblash, hech narsani o'zgartirmaslik")
+
+    def handle(self, *args, **options):
+        storage = Image._meta.get_field('img').storage
+        prefix = f'{ContentAddressedStorage.prefix}/'
+        dry_run = options['dry_run']
+
+        migrated = 0
+        bytes_before = 0
+        bytes_after = 0
+        seen_digests = set(StoredBlob.objects.values_list('name', flat=True))
+
+        for image in Image.objects.order_by('pk').iterator(chunk_size=200):
+            touched = False
+            with transaction.atomic():
+                changed = {}
+                old_names = []
+                for field_name in Image.FILE_FIELDS:
+                    field_file = getattr(image, field_name)
+                    old_name = field_file.name
+                    if not old_name or old_name.startswith(prefix) or not storage.exists(old_name):
+                        continue
+
+                    size = storage.size(old_name)
+                    bytes_before += size
+                    touched = True
+
+                    with storage.open(old_name, 'rb') as fh:
+                        if dry_run:
+                            blob_name = storage.blob_name(file_digest(fh), os.path.splitext(old_name)[1])
+                        else:
+                            blob_name = storage.save(old_name, fh)
+                            changed[field_name] = blob_name
+                            old_names.append(old_name)
+
+                    if blob_name not in seen_digests:
+                        seen_digests.add(blob_name)
+                        bytes_after += size
+
+                if changed:
+                    Image.objects.filter(pk=image.pk).update(**changed)
+                    # Eski fayllar refcount'da hisobga olinmagan - qatorlar saqlangandan keyin
+                    # to'g'ridan-to'g'ri o'chiriladi
+                    transaction.on_commit(lambda names=old_names: self._remove_files(storage, names))
+            if touched:
+                migrated += 1
+
+        saved = bytes_before - bytes_after
+        action = "Tekshirildi" if dry_run else "Ko'chirildi"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action}: {migrated} ta rasm. "
+            f"Oldin: {bytes_before} bayt, keyin: {bytes_after} bayt, tejaldi: {saved} bayt"
+        ))
+
+    def _remove_files(self, storage, names):
+        for name in names:
+            try:
+                os.remove(storage.path(name))
+            except FileNotFoundError:
+                pass
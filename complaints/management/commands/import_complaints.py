@@ -0,0 +1,321 @@
+import csv
+import io
+import json
+from datetime import datetime, time
+from pathlib import Path
+
+from django.contrib.gis.gdal import CoordTransform, DataSource, SpatialReference
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from common import tiles
+from common.models import District, Region, Tashkilot
+from common.pagination import invalidate_facets
+from common.text import normalize_uz
+from complaints.models import Complaint
+from complaints.search import SEARCH_CONFIG
+from users.models import CustomUser
+
+STAGE_TABLE = 'complaint_import_stage'
+STAGE_COLUMNS = (
+    'title', 'description', 'search_title', 'search_description', 'region_id', 'district_id',
+    'masul_tashkilot_id', 'status', 'priority', 'answer_text', 'location',
+    'created_at', 'closed_at',
+)
+STATUSES = dict(Complaint.STATUS_CHOICES)
+PRIORITIES = dict(Complaint.PRIORITY_CHOICES)
+
+
+class RowError(ValueError):
+    pass
+
+
+def name_key(name):
+    """Lotin/kirill, katta/kichik harf farqisiz nom kaliti"""
+    return ' '.join(normalize_uz(name).casefold().split())
+
+
+class Command(BaseCommand):
+    help = (
+        "Eski tizimlardagi murojaatlarni CSV yoki GeoJSON/Shapefile faylidan COPY orqali "
+        "partiyalab yuklaydi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV fayl yoki GDAL o'qiy oladigan fayl (GeoJSON, Shapefile)")
+        parser.add_argument('--user', required=True, help="Murojaatlar egasi bo'ladigan foydalanuvchi nomi")
+        parser.add_argument('--batch', type=int, default=10000, help="Bitta COPY partiyasidagi qatorlar")
+        parser.add_argument(
+            '--create-missing',
+            action='store_true',
+            help="Topilmagan viloyat/tuman/tashkilotlarni yaratish (aks holda qator xato deb yoziladi)",
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help="Checkpoint faylidagi oxirgi yuklangan qatordan davom ettirish",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"Fayl topilmadi: {path}")
+        try:
+            self.user_id = CustomUser.objects.get(username=options['user']).pk
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"Foydalanuvchi topilmadi: {options['user']}")
+
+        self.create_missing = options['create_missing']
+        self._load_lookups()
+
+        checkpoint_path = path.with_name(path.name + '.checkpoint')
+        errors_path = path.with_name(path.name + '.errors.csv')
+        start_after = 0
+        if options['resume'] and checkpoint_path.exists():
+            start_after = json.loads(checkpoint_path.read_text())['row']
+            self.stdout.write(f"{start_after}-qatordan keyin davom ettiriladi")
+
+        self._create_stage_table()
+
+        loaded = failed = 0
+        with open(errors_path, 'a' if options['resume'] else 'w', newline='', encoding='utf-8') as errors_file:
+            errors = csv.writer(errors_file)
+            if errors_file.tell() == 0:
+                errors.writerow(['row', 'error', 'data'])
+
+            # Xato qatorlar partiya bilan birga yoziladi: --resume checkpoint'dan keyingi
+            # qatorlarni qayta o'qiganda ular xatolar fayliga ikkinchi marta tushmaydi
+            batch, batch_errors, last_row = [], [], start_after
+            for number, record in self._read(path):
+                if number <= start_after:
+                    continue
+                last_row = number
+                try:
+                    batch.append(self._convert(record))
+                except RowError as exc:
+                    batch_errors.append([number, str(exc), json.dumps(record, ensure_ascii=False, default=str)])
+                if len(batch) >= options['batch']:
+                    loaded += self._flush(batch)
+                    failed += self._write_errors(errors_file, errors, batch_errors)
+                    self._save_checkpoint(checkpoint_path, last_row)
+                    self.stdout.write(f"{last_row}-qatorgacha: {loaded} ta yuklandi, {failed} ta xato")
+                    batch, batch_errors = [], []
+            if batch:
+                loaded += self._flush(batch)
+            failed += self._write_errors(errors_file, errors, batch_errors)
+            self._save_checkpoint(checkpoint_path, last_row)
+
+        if loaded:
+            # COPY save() ni chetlab o'tadi - hisoblagichlar, tayllar va admin facet'lari yangilanadi
+            call_command('rebuild_complaint_counters', stdout=self.stdout)
+            tiles.clear_cache()
+            invalidate_facets()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Import tugadi: {loaded} ta murojaat yuklandi, {failed} ta xato ({errors_path})"
+        ))
+
+    # ------------------------------------------------------------------
+    # O'qish
+
+    def _read(self, path):
+        """(qator raqami, {maydon: qiymat}) juftliklari; fayl oqim sifatida o'qiladi"""
+        if path.suffix.lower() == '.csv':
+            with open(path, newline='', encoding='utf-8-sig') as source:
+                for number, record in enumerate(csv.DictReader(source), start=1):
+                    yield number, record
+            return
+
+        layer = DataSource(str(path))[0]
+        transform = None
+        if layer.srs is not None and layer.srs.srid != 4326:
+            transform = CoordTransform(layer.srs, SpatialReference(4326))
+        for number, feature in enumerate(layer, start=1):
+            record = {field: feature.get(field) for field in layer.fields}
+            geom = feature.geom
+            if geom is not None and geom.geom_type.name.startswith('Point'):
+                if transform is not None:
+                    geom.transform(transform)
+                record['lng'], record['lat'] = geom.x, geom.y
+            yield number, record
+
+    # ------------------------------------------------------------------
+    # Nomlarni id'ga aylantirish
+
+    def _load_lookups(self):
+        self.regions = {name_key(name): pk for pk, name in Region.objects.values_list('pk', 'name')}
+        self.districts = {
+            (region_id, name_key(name)): pk
+            for pk, region_id, name in District.objects.values_list('pk', 'region_id', 'name')
+        }
+        self.organizations = {name_key(name): pk for pk, name in Tashkilot.objects.values_list('pk', 'name')}
+
+    def _region_id(self, name):
+        if not name:
+            return None
+        key = name_key(name)
+        if key not in self.regions:
+            if not self.create_missing:
+                raise RowError(f"Viloyat topilmadi: {name}")
+            self.regions[key] = Region.objects.create(name=name.strip()).pk
+        return self.regions[key]
+
+    def _district_id(self, region_id, name):
+        if not name:
+            return None
+        if region_id is None:
+            raise RowError(f"Tuman viloyatsiz berilgan: {name}")
+        key = (region_id, name_key(name))
+        if key not in self.districts:
+            if not self.create_missing:
+                raise RowError(f"Tuman topilmadi: {name}")
+            self.districts[key] = District.objects.create(name=name.strip(), region_id=region_id).pk
+        return self.districts[key]
+
+    def _organization_id(self, name):
+        if not name:
+            return None
+        key = name_key(name)
+        if key not in self.organizations:
+            if not self.create_missing:
+                raise RowError(f"Tashkilot topilmadi: {name}")
+            # Eski tizimdagi tashkilotlarda aloqa ma'lumotlari yo'q - keyin to'ldiriladi
+            self.organizations[key] = Tashkilot.objects.create(
+                name=name.strip(), manzil='', telefon='', email='',
+            ).pk
+        return self.organizations[key]
+
+    # ------------------------------------------------------------------
+    # Qatorni tekshirish
+
+    def _datetime(self, value, field):
+        if not value:
+            return None
+        if isinstance(value, datetime):
+            parsed = value
+        else:
+            value = str(value).strip()
+            parsed = parse_datetime(value)
+            if parsed is None:
+                date = parse_date(value)
+                if date is None:
+                    raise RowError(f"Noto'g'ri sana ({field}): {value}")
+                parsed = datetime.combine(date, time())
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def _location(self, record):
+        lat, lng = record.get('lat'), record.get('lng')
+        if lat in (None, '') and lng in (None, ''):
+            return None
+        try:
+            lat, lng = float(lat), float(lng)
+        except (TypeError, ValueError):
+            raise RowError(f"Noto'g'ri koordinata: {lat}, {lng}")
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise RowError(f"Koordinata chegaradan tashqarida: {lat}, {lng}")
+        return f'SRID=4326;POINT({lng} {lat})'
+
+    def _convert(self, record):
+        title = (record.get('title') or '').strip()
+        description = (record.get('description') or '').strip()
+        if not title:
+            raise RowError("Sarlavha bo'sh")
+        if len(title) > Complaint._meta.get_field('title').max_length:
+            raise RowError("Sarlavha juda uzun")
+
+        status = (record.get('status') or 'new').strip()
+        if status not in STATUSES:
+            raise RowError(f"Noma'lum holat: {status}")
+        priority = (record.get('priority') or '').strip() or None
+        if priority is not None and priority not in PRIORITIES:
+            raise RowError(f"Noma'lum prioritet: {priority}")
+
+        region_id = self._region_id((record.get('region') or '').strip())
+        district_id = self._district_id(region_id, (record.get('district') or '').strip())
+
+        return (
+            title,
+            description,
+            normalize_uz(title),
+            normalize_uz(description),
+            region_id,
+            district_id,
+            self._organization_id((record.get('organization') or '').strip()),
+            status,
+            priority,
+            (record.get('answer_text') or '').strip() or None,
+            self._location(record),
+            self._datetime(record.get('created_at'), 'created_at') or timezone.now(),
+            self._datetime(record.get('closed_at'), 'closed_at'),
+        )
+
+    # ------------------------------------------------------------------
+    # Yozish
+
+    def _create_stage_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                CREATE TEMPORARY TABLE IF NOT EXISTS {STAGE_TABLE} (
+                    title varchar(255),
+                    description text,
+                    search_title text,
+                    search_description text,
+                    region_id bigint,
+                    district_id bigint,
+                    masul_tashkilot_id bigint,
+                    status varchar(50),
+                    priority varchar(20),
+                    answer_text text,
+                    location geometry(Point, 4326),
+                    created_at timestamptz,
+                    closed_at timestamptz
+                ) ON COMMIT DELETE ROWS
+                """
+            )
+
+    def _flush(self, batch):
+        """Partiyani COPY bilan staging jadvalga, so'ng bitta INSERT ... SELECT bilan yozadi"""
+        buffer = io.StringIO()
+        # QUOTE_NOTNULL: None -> NULL, bo'sh satr -> ""
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NOTNULL)
+        writer.writerows(batch)
+        buffer.seek(0)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Tashqi tranzaksiya ichida chaqirilganda oldingi partiya jadvalda qolgan bo'ladi
+            cursor.execute(f'TRUNCATE {STAGE_TABLE}')
+            cursor.copy_expert(
+                f"COPY {STAGE_TABLE} ({', '.join(STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(
+                f"""
+                INSERT INTO {Complaint._meta.db_table} (
+                    title, description, region_id, district_id, masul_tashkilot_id, user_id,
+                    status, priority, answer_text, location, created_at, updated_at, closed_at,
+                    search_vector
+                )
+                SELECT
+                    title, description, region_id, district_id, masul_tashkilot_id, %s,
+                    status, priority, answer_text, location, created_at, created_at, closed_at,
+                    setweight(to_tsvector(%s, search_title), 'A')
+                        || setweight(to_tsvector(%s, search_description), 'B')
+                FROM {STAGE_TABLE}
+                """,
+                [self.user_id, SEARCH_CONFIG, SEARCH_CONFIG],
+            )
+            return cursor.rowcount
+
+    def _write_errors(self, errors_file, errors, rows):
+        errors.writerows(rows)
+        errors_file.flush()
+        return len(rows)
+
+    def _save_checkpoint(self, path, row):
+        path.write_text(json.dumps({'row': row}))
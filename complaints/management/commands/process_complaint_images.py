@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from complaints.images import PROCESSING_ERRORS, process_image
+from complaints.models import Image
+
+
+class Command(BaseCommand):
+    help = "Kichik nusxasi hali yaratilmagan murojaat rasmlarini qayta ishlaydi"
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        images = Image.objects.filter(thumbnail='').exclude(processing_state='failed')
+        for image in images.iterator(chunk_size=100):
+            try:
+                process_image(image)
+            except PROCESSING_ERRORS as exc:
+                Image.objects.filter(pk=image.pk).update(processing_state='failed')
+                failed += 1
+                self.stderr.write(f"Rasm #{image.pk}: {exc}")
+            else:
+                processed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Qayta ishlangan: {processed} ta, xato: {failed} ta"
+        ))
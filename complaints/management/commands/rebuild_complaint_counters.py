@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from complaints.models import Complaint, ComplaintCounter
+
+
+class Command(BaseCommand):
+    help = "ComplaintCounter jadvalini murojaatlardan noldan qayta quradi va farqlarni ko'rsatadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Faqat farqlarni ko'rsatish, jadvalni o'zgartirmaslik",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if not options['check']:
+                # Qayta qurish paytida murojaatlarni yozish hisoblagichlarni o'zgartira olmasin
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'LOCK TABLE {ComplaintCounter._meta.db_table} IN SHARE ROW EXCLUSIVE MODE'
+                    )
+
+            expected = {
+                ComplaintCounter.key_for(row): row['count']
+                for row in Complaint.objects.values(*ComplaintCounter.KEY_FIELDS).annotate(
+                    count=Count('id'),
+                ).order_by()
+            }
+            actual = {}
+            for row in ComplaintCounter.objects.values(*ComplaintCounter.KEY_FIELDS, 'count'):
+                if row['count']:
+                    actual[ComplaintCounter.key_for(row)] = row['count']
+
+            mismatched = [
+                key for key in expected.keys() | actual.keys()
+                if expected.get(key, 0) != actual.get(key, 0)
+            ]
+            for key in mismatched:
+                self.stdout.write(
+                    f"{dict(zip(ComplaintCounter.KEY_FIELDS, key))}: "
+                    f"kutilgan {expected.get(key, 0)}, jadvalda {actual.get(key, 0)}"
+                )
+
+            if options['check']:
+                self.stdout.write(f"Farqlar soni: {len(mismatched)}")
+                return
+
+            ComplaintCounter.objects.all().delete()
+            ComplaintCounter.objects.bulk_create(
+                [
+                    ComplaintCounter(count=count, **dict(zip(ComplaintCounter.KEY_FIELDS, key)))
+                    for key, count in expected.items()
+                ],
+                batch_size=1000,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Hisoblagichlar qayta qurildi: {len(expected)} ta guruh, {len(mismatched)} ta farq tuzatildi"
+        ))
@@ -0,0 +1,141 @@
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from common.models import Tashkilot
+from common.pagination import invalidate_facets
+from complaints.models import Complaint, ComplaintCounter
+from complaints.routing import OPEN_STATUSES, ROUTING_CANDIDATES, merge_candidates, open_load, rank_candidates
+
+
+class Command(BaseCommand):
+    help = "Tashkilot biriktirilmagan ochiq murojaatlarni bitta o'tishda yo'naltiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=1000,
+            help="Bitta partiyadagi murojaatlar soni",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Faqat natijani ko'rsatish, murojaatlarni o'zgartirmaslik",
+        )
+
+    def handle(self, *args, **options):
+        pending = list(
+            Complaint.objects.filter(
+                masul_tashkilot__isnull=True,
+                status__in=OPEN_STATUSES,
+            ).order_by('id').values_list('id', flat=True)
+        )
+        district_orgs = defaultdict(list)
+        for pk, district_id in Tashkilot.objects.filter(hudud__isnull=False).values_list('pk', 'hudud_id'):
+            district_orgs[district_id].append(pk)
+        # Har bir biriktirishdan keyin yangilanadi - yuklama tashkilotlar orasida taqsimlanadi
+        load = open_load()
+
+        assigned = 0
+        for start in range(0, len(pending), options['batch']):
+            ids = pending[start:start + options['batch']]
+            assignments = self._route_batch(ids, district_orgs, load)
+            if not options['dry_run']:
+                assignments = self._assign(assignments)
+            assigned += len(assignments)
+            self.stdout.write(f"{start + len(ids)}/{len(pending)}: {assigned} ta biriktirildi")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Yo'naltirildi: {assigned} ta murojaat, {len(pending) - assigned} ta nomzodsiz"
+        ))
+
+    def _route_batch(self, ids, district_orgs, load):
+        """{complaint_id: tashkilot_id} - har bir murojaat uchun eng yaxshi nomzod"""
+        complaints = Complaint._meta.db_table
+        organizations = Tashkilot._meta.db_table
+        covering, nearest = defaultdict(list), defaultdict(list)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT c.id, t.id
+                FROM {complaints} c
+                JOIN {organizations} t ON ST_Covers(t.service_area, c.location)
+                WHERE c.id = ANY(%s)
+                """,
+                [ids],
+            )
+            for complaint_id, org_id in cursor.fetchall():
+                covering[complaint_id].append(org_id)
+
+            # Har bir murojaat uchun LATERAL ichida indeksli KNN qidiruvi
+            cursor.execute(
+                f"""
+                SELECT c.id, t.id
+                FROM {complaints} c
+                CROSS JOIN LATERAL (
+                    SELECT o.id, o.location <-> c.location AS distance
+                    FROM {organizations} o
+                    WHERE o.location IS NOT NULL
+                    ORDER BY o.location <-> c.location
+                    LIMIT %s
+                ) t
+                WHERE c.id = ANY(%s) AND c.location IS NOT NULL
+                ORDER BY c.id, t.distance
+                """,
+                [ROUTING_CANDIDATES, ids],
+            )
+            for complaint_id, org_id in cursor.fetchall():
+                nearest[complaint_id].append(org_id)
+
+        districts = dict(Complaint.objects.filter(id__in=ids).values_list('id', 'district_id'))
+        assignments = {}
+        for complaint_id in ids:
+            candidates = merge_candidates(
+                covering[complaint_id],
+                district_orgs.get(districts.get(complaint_id), ()),
+                nearest[complaint_id],
+            )
+            if not candidates:
+                continue
+            best = rank_candidates(candidates, load)[0]
+            assignments[complaint_id] = best.tashkilot_id
+            load[best.tashkilot_id] = load.get(best.tashkilot_id, 0) + 1
+        return assignments
+
+    def _assign(self, assignments):
+        """
+        Bitta UPDATE bilan biriktiradi va hisoblagichlarni yangilaydi. Orada qo'lda
+        biriktirilgan murojaatlar o'tkazib yuboriladi; haqiqatda yangilanganlar qaytadi.
+        """
+        if not assignments:
+            return {}
+        key_columns = ', '.join(f'c.{field}' for field in ComplaintCounter.KEY_FIELDS)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {Complaint._meta.db_table} c
+                SET masul_tashkilot_id = v.org_id, updated_at = NOW()
+                FROM unnest(%s::bigint[], %s::bigint[]) AS v(id, org_id)
+                WHERE c.id = v.id AND c.masul_tashkilot_id IS NULL
+                RETURNING c.id, {key_columns}
+                """,
+                [list(assignments), list(assignments.values())],
+            )
+            rows = cursor.fetchall()
+
+            deltas = Counter()
+            for complaint_id, *key in rows:
+                new_key = tuple(key)
+                old_key = tuple(
+                    None if field == 'masul_tashkilot_id' else value
+                    for field, value in zip(ComplaintCounter.KEY_FIELDS, new_key)
+                )
+                deltas[new_key] += 1
+                deltas[old_key] -= 1
+            ComplaintCounter.objects.apply_deltas(deltas)
+            if rows:
+                transaction.on_commit(invalidate_facets)
+
+        return {complaint_id: assignments[complaint_id] for complaint_id, *_ in rows}
@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-17 10:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Complaint = apps.get_model('complaints', 'Complaint')
+    ComplaintCounter = apps.get_model('complaints', 'ComplaintCounter')
+    key_fields = ('region_id', 'district_id', 'masul_tashkilot_id', 'user_id', 'status', 'priority')
+    rows = Complaint.objects.values(*key_fields).annotate(count=Count('id')).order_by()
+    ComplaintCounter.objects.bulk_create(
+        [ComplaintCounter(**row) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+        ('complaints', '0004_alter_complaint_priority'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=50)),
+                ('priority', models.CharField(max_length=20, null=True)),
+                ('count', models.IntegerField(default=0)),
+                ('district', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='common.district')),
+                ('masul_tashkilot', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='common.tashkilot')),
+                ('region', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='common.region')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Murojaatlar hisoblagichi',
+                'verbose_name_plural': 'Murojaatlar hisoblagichlari',
+                'constraints': [models.UniqueConstraint(fields=('region', 'district', 'masul_tashkilot', 'user', 'status', 'priority'), name='complaint_counter_key', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0 on 2026-10-17 10:30
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indekslar jadvalni bloklamasdan (CONCURRENTLY) yaratiladi
+    atomic = False
+
+    dependencies = [
+        ('common', '0001_initial'),
+        ('complaints', '0005_complaintcounter'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(fields=['-created_at'], name='complaint_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(fields=['user', '-created_at'], name='complaint_user_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(fields=['masul_tashkilot', 'status', '-created_at'], name='complaint_org_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(fields=['status', '-created_at'], name='complaint_status_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(fields=['priority', '-created_at'], name='complaint_prio_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(fields=['region', '-created_at'], name='complaint_region_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('priority__isnull', True)), fields=['-created_at'], name='complaint_no_priority_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('priority', 'high'), ('status__in', ['new', 'in_progress'])), fields=['-created_at'], name='complaint_open_high_idx'),
+        ),
+    ]
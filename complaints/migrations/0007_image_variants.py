@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-17 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0006_complaint_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='img_webp',
+            field=models.ImageField(blank=True, upload_to='complaint_images/webp/'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='complaint_images/thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='thumbnail_webp',
+            field=models.ImageField(blank=True, upload_to='complaint_images/thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+def mark_processed_images(apps, schema_editor):
+    Image = apps.get_model('complaints', 'Image')
+    Image.objects.exclude(thumbnail='').update(processing_state='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0007_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='processing_state',
+            field=models.CharField(choices=[('pending', 'Navbatda'), ('processing', 'Qayta ishlanmoqda'), ('ready', 'Tayyor'), ('failed', 'Xato')], default='pending', max_length=20, verbose_name='Qayta ishlash holati'),
+        ),
+        migrations.RunPython(mark_processed_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-17 12:30
+
+import common.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_storedblob'),
+        ('complaints', '0008_image_processing_state'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='image',
+            name='img',
+            field=models.ImageField(storage=common.storage.content_addressed_storage, upload_to='complaint_images/'),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='img_webp',
+            field=models.ImageField(blank=True, storage=common.storage.content_addressed_storage, upload_to='complaint_images/webp/'),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='thumbnail',
+            field=models.ImageField(blank=True, storage=common.storage.content_addressed_storage, upload_to='complaint_images/thumbnails/'),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='thumbnail_webp',
+            field=models.ImageField(blank=True, storage=common.storage.content_addressed_storage, upload_to='complaint_images/thumbnails/'),
+        ),
+    ]
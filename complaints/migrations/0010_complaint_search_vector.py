@@ -0,0 +1,64 @@
+# Generated by Django 6.0 on 2026-10-17 13:00
+
+import re
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Value
+
+# complaints.search va common.text dan shu migratsiya uchun muzlatilgan nusxa:
+# ilova kodi keyinchalik o'zgarsa ham migratsiya natijasi o'zgarmasligi kerak
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'j', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'x', 'ц': 's', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': "'",
+    'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya', 'ў': "o'", 'қ': 'q',
+    'ғ': "g'", 'ҳ': 'h',
+}
+APOSTROPHES = re.compile(r"[ʻʼ’‘`´]")
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(text):
+    if not text:
+        return ''
+    text = ''.join(CYRILLIC_TO_LATIN.get(char, char) for char in text.lower())
+    return WHITESPACE.sub(' ', APOSTROPHES.sub("'", text)).strip()
+
+
+def search_vector(title, description):
+    return (
+        SearchVector(Value(normalize(title)), weight='A', config='simple')
+        + SearchVector(Value(normalize(description)), weight='B', config='simple')
+    )
+
+
+def populate_search_vector(apps, schema_editor):
+    Complaint = apps.get_model('complaints', 'Complaint')
+    batch = []
+    for complaint in Complaint.objects.only('id', 'title', 'description').iterator(chunk_size=2000):
+        complaint.search_vector = search_vector(complaint.title, complaint.description)
+        batch.append(complaint)
+        if len(batch) >= 2000:
+            Complaint.objects.bulk_update(batch, ['search_vector'])
+            batch = []
+    if batch:
+        Complaint.objects.bulk_update(batch, ['search_vector'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0009_image_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-17 13:00
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('complaints', '0010_complaint_search_vector'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='complaint_search_idx'),
+        ),
+    ]
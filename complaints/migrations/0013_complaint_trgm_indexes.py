@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-17 14:00
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('complaints', '0012_complaint_duplicate_of'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='complaint_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['description'], name='complaint_desc_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-17 15:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0013_complaint_trgm_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkActionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('priority', 'Prioritet'), ('status', 'Holat'), ('masul_tashkilot', "Mas'ul tashkilot")], max_length=30, verbose_name='Amal')),
+                ('value', models.CharField(blank=True, max_length=255, verbose_name='Yangi qiymat')),
+                ('complaint_ids', models.JSONField(blank=True, null=True, verbose_name='Murojaatlar')),
+                ('filters', models.JSONField(blank=True, null=True, verbose_name='Filtr')),
+                ('affected', models.PositiveIntegerField(default=0, verbose_name="O'zgargan murojaatlar")),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Foydalanuvchi')),
+            ],
+            options={
+                'verbose_name': 'Ommaviy amal',
+                'verbose_name_plural': 'Ommaviy amallar jurnali',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
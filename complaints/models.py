@@ -1,10 +1,44 @@
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchRank, SearchVectorField
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Cast
 
 from django.conf import settings # User modelni olishning to'g'ri yo'li
+from common.boundaries import locate
 from common.models import Region, District, Tashkilot
+from common.storage import content_addressed_storage
+from .search import build_search_query, build_search_vector
 from users.models import CustomUser
 
 # Create your models here.
+class ComplaintQuerySet(models.QuerySet):
+    """Shablonlarda ishlatiladigan bog'lanishlarni oldindan yuklaydigan so'rovlar"""
+
+    def for_listing(self):
+        """Ro'yxat sahifalari: foydalanuvchi, hudud va tashkilot bitta JOIN bilan"""
+        return self.select_related('user', 'region', 'district', 'masul_tashkilot').defer(
+            'region__boundary', 'district__boundary', 'masul_tashkilot__service_area',
+        )
+
+    def search(self, text):
+        """
+        To'liq matnli qidiruv. `search_rank` butun son (ts_rank * 1e6) - keyset
+        sahifalashda kursor qiymati sifatida aniq solishtirilishi uchun.
+        """
+        query = build_search_query(text)
+        return self.filter(search_vector=query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), query) * 1000000, models.IntegerField()),
+        )
+
+    def for_detail(self):
+        """Batafsil sahifalar: ro'yxatdagi bog'lanishlar va rasmlar"""
+        return self.for_listing().prefetch_related(
+            models.Prefetch('images', queryset=Image.objects.exclude(processing_state='failed')),
+        )
+
+
 # 5. COMPLAINTS (Asosiy o'zgarish shu yerda)
 class Complaint(models.Model):
     STATUS_CHOICES = (
@@ -38,18 +72,254 @@ class Complaint(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     viewed_at = models.DateTimeField(null=True, blank=True)
     closed_at = models.DateTimeField(null=True, blank=True)
+    # Yaratish paytida complaints/duplicates.py tomonidan klaster asosiy murojaatiga bog'lanadi
+    duplicate_of = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='duplicates', verbose_name="Takroriy (asosiy murojaat)",
+    )
+    # Qidiruv vektori save() paytida yangilanadi (complaints/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ComplaintQuerySet.as_manager()
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Bazadan o'qilgan qiymatlar - save() paytida nima o'zgarganini bilish uchun
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def _stored_counter_key(self):
+        """Bazada hozir saqlangan qator uchun hisoblagich kaliti"""
+        loaded = getattr(self, '_loaded_values', None) or {}
+        if all(field in loaded for field in ComplaintCounter.KEY_FIELDS):
+            return ComplaintCounter.key_for(loaded)
+        stored = type(self).objects.filter(pk=self.pk).values(*ComplaintCounter.KEY_FIELDS).first()
+        return ComplaintCounter.key_for(stored) if stored else None
+
+    def _search_text_changed(self):
+        loaded = getattr(self, '_loaded_values', None) or {}
+        return any(
+            field not in loaded or loaded[field] != getattr(self, field)
+            for field in ('title', 'description')
+        )
+
+    def _location_changed(self):
+        loaded = getattr(self, '_loaded_values', None) or {}
+        return 'location' not in loaded or loaded['location'] != self.location
+
+    def assign_boundaries(self):
+        """Viloyat va tumanni `location` nuqtasi tushgan chegaralardan aniqlaydi"""
+        region_id, district_id = locate(self.location)
+        if region_id is None:
+            return
+        if district_id is None and self.region_id == region_id:
+            # Tuman chegarasi yuklanmagan - qo'lda tanlangan tuman saqlanib qoladi
+            return
+        self.region_id = region_id
+        self.district_id = district_id
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        updated = None
+        if update_fields is not None:
+            updated = {self._meta.get_field(name).attname for name in update_fields}
+        if updated is None and self.location is not None and (
+            self._state.adding or self._location_changed()
+        ):
+            self.assign_boundaries()
+        track_counters = updated is None or bool(updated & set(ComplaintCounter.KEY_FIELDS))
+        update_search = (updated is None or bool(updated & {'title', 'description'})) and (
+            self._state.adding or self._search_text_changed()
+        )
+
+        # Hisoblagichlar va qidiruv vektori murojaat bilan bitta tranzaksiyada yangilanadi
+        with transaction.atomic():
+            old_key = None
+            if track_counters and not self._state.adding:
+                old_key = self._stored_counter_key()
+            super().save(*args, **kwargs)
+
+            if track_counters:
+                new_key = ComplaintCounter.key_for(self)
+                if old_key != new_key:
+                    deltas = {new_key: 1}
+                    if old_key is not None:
+                        deltas[old_key] = -1
+                    ComplaintCounter.objects.apply_deltas(deltas)
+
+            if update_search:
+                type(self).objects.filter(pk=self.pk).update(
+                    search_vector=build_search_vector(self.title, self.description),
+                )
+                # Xotiradagi qiymat eskirdi: maydon "kechiktirilgan" bo'lib qoladi, keyingi
+                # save() uni NULL bilan ustidan yozmaydi, o'qilganda esa bazadan olinadi
+                self.__dict__.pop('search_vector', None)
+
+        self._remember_loaded_values(updated)
+
+    def _remember_loaded_values(self, updated):
+        """Saqlangan qiymatlar keyingi save() uchun bazadagi holat sifatida eslab qolinadi"""
+        loaded = dict(getattr(self, '_loaded_values', None) or {}) if updated is not None else {}
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred or (updated is not None and field.attname not in updated):
+                continue
+            loaded[field.attname] = getattr(self, field.attname)
+        self._loaded_values = loaded
+
     class Meta:
         verbose_name = "Murojaat"
         verbose_name_plural = "Murojaatlar"
+        # Ro'yxatlardagi filtr + `-created_at` saralash yo'llari uchun.
+        # `location` uchun GiST indeksini PointField o'zi yaratadi (spatial_index=True).
+        indexes = [
+            models.Index(fields=['-created_at'], name='complaint_created_idx'),
+            models.Index(fields=['user', '-created_at'], name='complaint_user_created_idx'),
+            models.Index(fields=['masul_tashkilot', 'status', '-created_at'], name='complaint_org_status_idx'),
+            models.Index(fields=['status', '-created_at'], name='complaint_status_created_idx'),
+            models.Index(fields=['priority', '-created_at'], name='complaint_prio_created_idx'),
+            models.Index(fields=['region', '-created_at'], name='complaint_region_created_idx'),
+            models.Index(
+                fields=['-created_at'],
+                name='complaint_no_priority_idx',
+                condition=models.Q(priority__isnull=True),
+            ),
+            models.Index(
+                fields=['-created_at'],
+                name='complaint_open_high_idx',
+                condition=models.Q(priority='high', status__in=['new', 'in_progress']),
+            ),
+            GinIndex(fields=['search_vector'], name='complaint_search_idx'),
+            GinIndex(fields=['title'], name='complaint_title_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['description'], name='complaint_desc_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
+
+class ComplaintCounterManager(models.Manager):
+    def apply_deltas(self, deltas):
+        """{kalit: o'zgarish} ko'rinishidagi o'zgarishlarni hisoblagichlarga qo'shadi"""
+        for key, delta in deltas.items():
+            if not delta:
+                continue
+            lookup = dict(zip(self.model.KEY_FIELDS, key))
+            updated = self.filter(**lookup).update(count=F('count') + delta)
+            if updated or delta < 0:
+                continue
+            try:
+                with transaction.atomic():
+                    self.create(count=delta, **lookup)
+            except IntegrityError:
+                # Parallel so'rov shu qatorni bizdan oldin yaratib ulgurdi
+                self.filter(**lookup).update(count=F('count') + delta)
+
+
+# 5.1 MUROJAATLAR HISOBLAGICHLARI
+class ComplaintCounter(models.Model):
+    """
+    Dashboardlar uchun (viloyat, tuman, tashkilot, foydalanuvchi, holat, prioritet)
+    kesimidagi murojaatlar soni. Complaint.save() va o'chirish paytida yangilanadi,
+    `rebuild_complaint_counters` buyrug'i esa uni noldan qayta quradi.
+    """
+    KEY_FIELDS = ('region_id', 'district_id', 'masul_tashkilot_id', 'user_id', 'status', 'priority')
+
+    # Viloyat/tuman/tashkilot o'chirilganda murojaatlar SET_NULL bilan ommaviy yangilanadi,
+    # shuning uchun bu yerda FK cheklovi qo'yilmaydi - farqni rebuild buyrug'i tuzatadi
+    region = models.ForeignKey(Region, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    district = models.ForeignKey(District, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    masul_tashkilot = models.ForeignKey(Tashkilot, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    status = models.CharField(max_length=50)
+    priority = models.CharField(max_length=20, null=True)
+    count = models.IntegerField(default=0)
+
+    objects = ComplaintCounterManager()
+
+    @classmethod
+    def key_for(cls, source):
+        """Complaint obyekti yoki qiymatlar lug'atidan hisoblagich kalitini yasaydi"""
+        if isinstance(source, dict):
+            return tuple(source.get(field) for field in cls.KEY_FIELDS)
+        return tuple(getattr(source, field) for field in cls.KEY_FIELDS)
+
+    def __str__(self):
+        return f"{self.status}/{self.priority}: {self.count}"
+
+    class Meta:
+        verbose_name = "Murojaatlar hisoblagichi"
+        verbose_name_plural = "Murojaatlar hisoblagichlari"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['region', 'district', 'masul_tashkilot', 'user', 'status', 'priority'],
+                name='complaint_counter_key',
+                nulls_distinct=False,
+            ),
+        ]
+
+# 5.2 OMMAVIY AMALLAR JURNALI
+class BulkActionLog(models.Model):
+    """Ommaviy amal uchun bitta audit yozuvi (complaints/bulk.py)"""
+    ACTION_CHOICES = (
+        ('priority', 'Prioritet'),
+        ('status', 'Holat'),
+        ('masul_tashkilot', "Mas'ul tashkilot"),
+    )
+
+    user = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, related_name='+', verbose_name="Foydalanuvchi")
+    action = models.CharField(max_length=30, choices=ACTION_CHOICES, verbose_name="Amal")
+    value = models.CharField(max_length=255, blank=True, verbose_name="Yangi qiymat")
+    # Tanlangan murojaatlar yoki "filtrga mos barchasi" uchun filtr parametrlari
+    complaint_ids = models.JSONField(null=True, blank=True, verbose_name="Murojaatlar")
+    filters = models.JSONField(null=True, blank=True, verbose_name="Filtr")
+    affected = models.PositiveIntegerField(default=0, verbose_name="O'zgargan murojaatlar")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.get_action_display()} = {self.value} ({self.affected})"
+
+    class Meta:
+        verbose_name = "Ommaviy amal"
+        verbose_name_plural = "Ommaviy amallar jurnali"
+        ordering = ['-created_at']
 
 # 6. IMAGES
 class Image(models.Model):
+    PROCESSING_STATE_CHOICES = (
+        ('pending', 'Navbatda'),
+        ('processing', 'Qayta ishlanmoqda'),
+        ('ready', 'Tayyor'),
+        ('failed', 'Xato'),
+    )
+
     complaint = models.ForeignKey(Complaint, on_delete=models.CASCADE, related_name='images')
-    img = models.ImageField(upload_to='complaint_images/')
+    img = models.ImageField(upload_to='complaint_images/', storage=content_addressed_storage)
+    processing_state = models.CharField(max_length=20, choices=PROCESSING_STATE_CHOICES, default='pending', verbose_name="Qayta ishlash holati")
+    # complaints/images.py tomonidan yaratiladigan variantlar
+    img_webp = models.ImageField(upload_to='complaint_images/webp/', storage=content_addressed_storage, blank=True)
+    thumbnail = models.ImageField(upload_to='complaint_images/thumbnails/', storage=content_addressed_storage, blank=True)
+    thumbnail_webp = models.ImageField(upload_to='complaint_images/thumbnails/', storage=content_addressed_storage, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
 
     def __str__(self):
-        return f"Image {self.id}"
\ No newline at end of file
+        return f"Image {self.id}"
+
+    FILE_FIELDS = ('img', 'img_webp', 'thumbnail', 'thumbnail_webp')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Saqlashda almashtirilgan fayllar havolasini qaytarish uchun (complaints/signals.py)
+        instance._loaded_files = {
+            name: value for name, value in zip(field_names, values) if name in cls.FILE_FIELDS
+        }
+        return instance
+
+    @property
+    def preview_url(self):
+        """Kichik nusxa, u hali yaratilmagan bo'lsa asl rasm"""
+        if self.thumbnail:
+            return self.thumbnail.url
+        return self.img.url
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+Murojaat uchun mas'ul tashkilotni tanlash.
+
+Nomzodlar uch manbadan yig'iladi:
+  - xizmat hududi (`service_area`) murojaat nuqtasini qamrab olgan tashkilotlar;
+  - murojaat tumanidagi tashkilotlar (`Tashkilot.hudud`);
+  - `location` bo'yicha eng yaqin tashkilotlar (KNN, `<->` operatori GiST indeksda).
+Saralash: avval qamrov darajasi (hudud > tuman > yaqinlik), keyin ochiq murojaatlar
+soni bo'yicha eng kam yuklangani, so'ng masofa.
+"""
+from dataclasses import dataclass, replace
+
+from django.contrib.gis.db.models.functions import GeometryDistance
+from django.db.models import Sum
+
+from common.models import Tashkilot
+from .models import ComplaintCounter
+
+ROUTING_CANDIDATES = 5
+OPEN_STATUSES = ('new', 'in_progress')
+
+
+@dataclass(frozen=True)
+class RoutingCandidate:
+    tashkilot_id: int
+    covers: bool = False
+    same_district: bool = False
+    # 0 - eng yaqini; KNN natijalariga kirmagan bo'lsa None
+    knn_rank: int | None = None
+    open_count: int = 0
+    tashkilot: Tashkilot | None = None
+
+    @property
+    def tier(self):
+        if self.covers:
+            return 0
+        if self.same_district:
+            return 1
+        return 2
+
+    def sort_key(self):
+        rank = ROUTING_CANDIDATES if self.knn_rank is None else self.knn_rank
+        return (self.tier, self.open_count, rank, self.tashkilot_id)
+
+
+def merge_candidates(covering=(), district=(), nearest=()):
+    """Uch manbadagi tashkilot id'larini bitta nomzodlar ro'yxatiga birlashtiradi"""
+    flags = {}
+    for pk in covering:
+        flags.setdefault(pk, {})['covers'] = True
+    for pk in district:
+        flags.setdefault(pk, {})['same_district'] = True
+    for rank, pk in enumerate(nearest):
+        flags.setdefault(pk, {}).setdefault('knn_rank', rank)
+    return [RoutingCandidate(pk, **values) for pk, values in flags.items()]
+
+
+def rank_candidates(candidates, load):
+    """Nomzodlarni joriy yuklama ({tashkilot_id: ochiq murojaatlar}) bilan saralaydi"""
+    return sorted(
+        (replace(candidate, open_count=load.get(candidate.tashkilot_id, 0)) for candidate in candidates),
+        key=RoutingCandidate.sort_key,
+    )
+
+
+def open_load():
+    """Har bir tashkilotdagi ochiq murojaatlar soni (ComplaintCounter jadvalidan)"""
+    rows = (
+        ComplaintCounter.objects
+        .filter(status__in=OPEN_STATUSES, masul_tashkilot__isnull=False)
+        .values('masul_tashkilot_id')
+        .annotate(total=Sum('count'))
+        .order_by()
+    )
+    return {row['masul_tashkilot_id']: row['total'] for row in rows}
+
+
+def find_candidates(complaint):
+    covering, district, nearest = [], [], []
+    if complaint.location is not None:
+        covering = Tashkilot.objects.filter(
+            service_area__covers=complaint.location,
+        ).values_list('pk', flat=True)
+        nearest = Tashkilot.objects.filter(location__isnull=False).order_by(
+            GeometryDistance('location', complaint.location),
+        ).values_list('pk', flat=True)[:ROUTING_CANDIDATES]
+    if complaint.district_id:
+        district = Tashkilot.objects.filter(hudud_id=complaint.district_id).values_list('pk', flat=True)
+    return merge_candidates(covering, district, nearest)
+
+
+def suggest_organizations(complaint, limit=3):
+    """Eng mos tashkilotlar (`tashkilot` maydoni to'ldirilgan RoutingCandidate'lar)"""
+    ranked = rank_candidates(find_candidates(complaint), open_load())[:limit]
+    organizations = Tashkilot.objects.in_bulk([candidate.tashkilot_id for candidate in ranked])
+    return [
+        replace(candidate, tashkilot=organizations[candidate.tashkilot_id])
+        for candidate in ranked
+        if candidate.tashkilot_id in organizations
+    ]
+
+
+def route_complaint(complaint):
+    """Murojaat uchun eng mos tashkilot yoki None"""
+    suggestions = suggest_organizations(complaint, limit=1)
+    return suggestions[0].tashkilot if suggestions else None
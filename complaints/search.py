@@ -0,0 +1,25 @@
+"""
+Murojaatlar bo'yicha to'liq matnli qidiruv (PostgreSQL tsvector + GIN).
+
+Matn lotin/kirill yozuvidan qat'i nazar `normalize_uz` orqali bir xil
+ko'rinishga keltiriladi va 'simple' konfiguratsiyasi bilan indekslanadi
+(o'zbek tili uchun PostgreSQL'da stemmer yo'q).
+"""
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db.models import Value
+
+from common.text import normalize_uz
+
+SEARCH_CONFIG = 'simple'
+
+
+def build_search_vector(title, description):
+    """Sarlavha (A vazn) va tavsifdan (B vazn) tsvector ifodasi"""
+    return (
+        SearchVector(Value(normalize_uz(title)), weight='A', config=SEARCH_CONFIG)
+        + SearchVector(Value(normalize_uz(description)), weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def build_search_query(text):
+    return SearchQuery(normalize_uz(text), config=SEARCH_CONFIG, search_type='websearch')
@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common import tiles
+from common.pagination import invalidate_facets
+from .models import Complaint, ComplaintCounter, Image
+
+# Vektor taylga yoziladigan maydonlar - ulardan biri o'zgarsa tayl eskiradi
+TILE_FIELDS = ('location', 'status', 'priority', 'title', 'region_id', 'district_id')
+
+
+def _invalidate_tiles_on_commit(points):
+    # Tranzaksiya tugamasdan tayl qayta yaratilsa, unga eski ma'lumot yozilib qoladi
+    transaction.on_commit(lambda: tiles.invalidate_points(points))
+
+
+@receiver(post_save, sender=Complaint)
+def invalidate_complaint_tiles(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None)
+    if created or loaded is None:
+        _invalidate_tiles_on_commit([instance.location])
+    elif any(field in loaded and loaded[field] != getattr(instance, field) for field in TILE_FIELDS):
+        _invalidate_tiles_on_commit([loaded.get('location'), instance.location])
+
+
+@receiver(post_delete, sender=Complaint)
+def invalidate_deleted_complaint_tiles(sender, instance, **kwargs):
+    _invalidate_tiles_on_commit([instance.location])
+
+
+@receiver(post_delete, sender=Complaint)
+def decrement_complaint_counter(sender, instance, **kwargs):
+    # post_delete o'chirish tranzaksiyasi ichida yuboriladi (kaskad o'chirishda ham)
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if all(field in loaded for field in ComplaintCounter.KEY_FIELDS):
+        key = ComplaintCounter.key_for(loaded)
+    else:
+        key = ComplaintCounter.key_for(instance)
+    ComplaintCounter.objects.apply_deltas({key: -1})
+
+
+@receiver(post_delete, sender=Image)
+def release_image_files(sender, instance, **kwargs):
+    # Fayl boshqa rasmlar tomonidan ham ishlatilishi mumkin - storage havolalar sonini kamaytiradi
+    for name in Image.FILE_FIELDS:
+        field_file = getattr(instance, name)
+        if field_file:
+            field_file.storage.delete(field_file.name)
+
+
+@receiver(post_save, sender=Image)
+def release_replaced_image_files(sender, instance, update_fields=None, **kwargs):
+    # Admin yoki forma orqali almashtirilgan/tozalangan fayl havolasi saqlash tranzaksiyasi ichida kamayadi
+    loaded = getattr(instance, '_loaded_files', None) or {}
+    stored = dict(loaded)
+    for name in Image.FILE_FIELDS:
+        if update_fields is not None and name not in update_fields:
+            continue
+        field_file = getattr(instance, name)
+        old_name = loaded.get(name)
+        if old_name and old_name != field_file.name:
+            field_file.storage.delete(old_name)
+        stored[name] = field_file.name
+    instance._loaded_files = stored
+
+
+@receiver([post_save, post_delete], sender=Complaint)
+@receiver([post_save, post_delete], sender=Image)
+def invalidate_admin_facets(sender, **kwargs):
+    transaction.on_commit(invalidate_facets)
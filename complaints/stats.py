@@ -0,0 +1,68 @@
+"""
+Dashboardlar uchun murojaatlar statistikasi.
+
+Barcha hisoblagichlar (holat x prioritet x viloyat) ComplaintCounter jadvalidan
+bitta GROUP BY so'rovi bilan olinadi, shuning uchun so'rov narxi murojaatlar
+soniga emas, guruhlar soniga bog'liq. Qolgan yig'indilar Python tomonida hisoblanadi.
+Hisoblagichlar murojaat bilan bitta tranzaksiyada yangilanadi, shuning uchun natija
+keshlanmaydi - yangi murojaat dashboardda darhol ko'rinadi.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.db.models import Sum
+
+from .models import ComplaintCounter
+
+
+@dataclass(frozen=True)
+class ComplaintStats:
+    total: int = 0
+    by_status: dict = field(default_factory=dict)
+    by_priority: dict = field(default_factory=dict)
+    by_region: dict = field(default_factory=dict)
+
+    def status_count(self, *statuses):
+        return sum(self.by_status.get(status, 0) for status in statuses)
+
+    def priority_count(self, priority):
+        """priority=None - prioriteti belgilanmagan murojaatlar"""
+        return self.by_priority.get(priority, 0)
+
+    def top_regions(self, limit=5):
+        """`region__name`/`count` ko'rinishidagi eng ko'p murojaatli viloyatlar"""
+        ordered = sorted(self.by_region.items(), key=lambda item: item[1], reverse=True)
+        return [{'region__name': name, 'count': count} for name, count in ordered[:limit]]
+
+
+def get_complaint_stats(by_region=False, **filters):
+    """
+    `filters` bo'yicha tanlangan murojaatlar statistikasini bitta so'rovda hisoblaydi.
+    Filtrlar ComplaintCounter kalit maydonlari bo'yicha beriladi: region, district,
+    masul_tashkilot, user, status, priority.
+
+    Misol: get_complaint_stats(user=request.user)
+    """
+    group_by = ['status', 'priority']
+    if by_region:
+        group_by.append('region__name')
+
+    rows = ComplaintCounter.objects.filter(**filters).values(*group_by).annotate(
+        count=Sum('count'),
+    ).order_by()
+
+    by_status = Counter()
+    by_priority = Counter()
+    regions = Counter()
+    for row in rows:
+        by_status[row['status']] += row['count']
+        by_priority[row['priority']] += row['count']
+        if by_region:
+            regions[row['region__name']] += row['count']
+
+    return ComplaintStats(
+        total=sum(by_status.values()),
+        by_status=dict(by_status),
+        by_priority=dict(by_priority),
+        by_region=dict(regions),
+    )
@@ -0,0 +1,29 @@
+import logging
+
+from django.db import transaction
+
+from common.jobs import task
+from .images import PROCESSING_ERRORS, process_image
+from .models import Image
+
+logger = logging.getLogger(__name__)
+
+
+@task('process_complaint_images')
+def process_complaint_images(image_ids):
+    # Vazifa qayta bajarilishi mumkin (requeue_stale_jobs) - tayyor rasmlar o'tkazib yuboriladi,
+    # parallel ishlov berishni esa process_image o'zi hal qiladi
+    images = Image.objects.filter(pk__in=image_ids).exclude(processing_state__in=['ready', 'failed'])
+    for image in images:
+        Image.objects.filter(pk=image.pk, processing_state='pending').update(processing_state='processing')
+        try:
+            process_image(image)
+        except PROCESSING_ERRORS:
+            # Rasm emas yoki buzilgan fayl - qayta urinishdan foyda yo'q
+            logger.warning("Rasm #%s qayta ishlanmadi", image.pk, exc_info=True)
+            with transaction.atomic():
+                failed = Image.objects.filter(pk=image.pk, img=image.img.name).exclude(
+                    processing_state='ready',
+                ).update(processing_state='failed', img='')
+                if failed:
+                    image.img.storage.delete(image.img.name)
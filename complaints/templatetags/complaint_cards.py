@@ -0,0 +1,101 @@
+"""
+Murojaat kartochkalari uchun fragment keshi.
+
+    {% load complaint_cards %}
+    {% complaint_cards complaints "admin-list" %}
+        {% for complaint in complaints %}
+            {% complaint_card complaint "admin-list" %} ... {% endcomplaint_card %}
+        {% endfor %}
+    {% endcomplaint_cards %}
+
+Kalit murojaat id si, `updated_at`, muallifning id si va `updated_at` i hamda
+ma'lumotnomalar versiyasidan tuziladi, shuning uchun murojaat, foydalanuvchi nomi yoki
+viloyat nomi o'zgarganda eski fragment o'z-o'zidan ishlatilmay qoladi. Ro'yxat
+so'rovida `user` oldindan yuklangan bo'lishi kerak (`for_listing()`).
+Tashqi teg sahifadagi barcha kartochkalarni bitta `get_many` bilan oladi va
+yangi render qilinganlarini bitta `set_many` bilan yozadi.
+Fragment ichida foydalanuvchiga bog'liq narsa (csrf_token, request.user) bo'lmasligi kerak.
+"""
+from django import template
+from django.core.cache import cache
+
+from common import reference
+from common.cache import make_key
+
+register = template.Library()
+
+CARD_CACHE_TIMEOUT = 60 * 60
+RENDER_CONTEXT_KEY = 'complaint_cards'
+
+
+def card_key(variant, complaint):
+    return make_key(
+        'complaint-card', variant, reference.version(), complaint.pk, complaint.updated_at.timestamp(),
+        complaint.user_id, complaint.user.updated_at.timestamp(),
+    )
+
+
+class ComplaintCardsNode(template.Node):
+    def __init__(self, nodelist, complaints, variant):
+        self.nodelist = nodelist
+        self.complaints = complaints
+        self.variant = variant
+
+    def render(self, context):
+        variant = self.variant.resolve(context)
+        keys = [card_key(variant, complaint) for complaint in self.complaints.resolve(context)]
+        state = {'hits': cache.get_many(keys) if keys else {}, 'misses': {}}
+        context.render_context[(RENDER_CONTEXT_KEY, variant)] = state
+        try:
+            output = self.nodelist.render(context)
+        finally:
+            del context.render_context[(RENDER_CONTEXT_KEY, variant)]
+        if state['misses']:
+            cache.set_many(state['misses'], CARD_CACHE_TIMEOUT)
+        return output
+
+
+class ComplaintCardNode(template.Node):
+    def __init__(self, nodelist, complaint, variant):
+        self.nodelist = nodelist
+        self.complaint = complaint
+        self.variant = variant
+
+    def render(self, context):
+        variant = self.variant.resolve(context)
+        key = card_key(variant, self.complaint.resolve(context))
+        state = context.render_context.get((RENDER_CONTEXT_KEY, variant))
+        if state is None:
+            # {% complaint_cards %} siz - har bir kartochka alohida so'rov
+            fragment = cache.get(key)
+            if fragment is None:
+                fragment = self.nodelist.render(context)
+                cache.set(key, fragment, CARD_CACHE_TIMEOUT)
+            return fragment
+
+        fragment = state['hits'].get(key)
+        if fragment is None:
+            fragment = self.nodelist.render(context)
+            state['misses'][key] = fragment
+        return fragment
+
+
+def _parse(parser, token, node_class):
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tegi ikkita argument oladi: obyekt va variant nomi")
+    nodelist = parser.parse((f'end{bits[0]}',))
+    parser.delete_first_token()
+    return node_class(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
+
+
+@register.tag
+def complaint_cards(parser, token):
+    """{% complaint_cards complaints "variant" %} ... {% endcomplaint_cards %}"""
+    return _parse(parser, token, ComplaintCardsNode)
+
+
+@register.tag
+def complaint_card(parser, token):
+    """{% complaint_card complaint "variant" %} ... {% endcomplaint_card %}"""
+    return _parse(parser, token, ComplaintCardNode)
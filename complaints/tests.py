@@ -1,3 +1,838 @@
-from django.test import TestCase
+import csv
+import datetime
+import json
+import shutil
+import tempfile
+from collections import Counter
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models.sql import compiler
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from PIL import Image as PILImage
+
+from common.models import District, Region, StoredBlob, Tashkilot
+from users.models import CustomUser
+
+from .bulk import apply_bulk_action
+from .duplicates import link_duplicate
+from .export import csv_stream
+from .forms import ComplaintCreateForm
+from .images import process_image
+from .management.commands import import_complaints
+from .management.commands.import_complaints import RowError, name_key
+from .models import Complaint, ComplaintCounter, Image
+from .routing import route_complaint
+from .stats import get_complaint_stats
+
+# Sahifa uchun SQL so'rovlar chegarasi (sessiya va foydalanuvchi so'rovlari bilan birga)
+LIST_QUERY_BUDGET = 8
+DETAIL_QUERY_BUDGET = 8
+
+
+class ComplaintTestData:
+    @classmethod
+    def setUpTestData(cls):
+        cls.region = Region.objects.create(name='Toshkent viloyati')
+        cls.other_region = Region.objects.create(name='Samarqand viloyati')
+        cls.district = District.objects.create(name='Chirchiq', region=cls.region)
+        cls.user = CustomUser.objects.create_user('fuqaro', password='parol123', role='user')
+        cls.admin = CustomUser.objects.create_user('admin', password='parol123', role='admin')
+
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def create_complaint(cls, **kwargs):
+        values = {
+            'title': 'Chiqindi',
+            'description': "Ko'chada chiqindi to'planib qolgan",
+            'region': cls.region,
+            'district': cls.district,
+            'user': cls.user,
+        }
+        values.update(kwargs)
+        return Complaint.objects.create(**values)
+
+
+class ComplaintStatsTests(ComplaintTestData, TestCase):
+    def test_stats_use_single_grouped_query(self):
+        self.create_complaint(status='new', priority='high')
+        self.create_complaint(status='new')
+        self.create_complaint(status='closed', priority='low', region=self.other_region, district=None)
+
+        with self.assertNumQueries(1):
+            stats = get_complaint_stats(by_region=True)
+
+        self.assertEqual(stats.total, 3)
+        self.assertEqual(stats.status_count('new'), 2)
+        self.assertEqual(stats.priority_count('high'), 1)
+        self.assertEqual(stats.priority_count(None), 1)
+        self.assertEqual(stats.by_region, {'Toshkent viloyati': 2, 'Samarqand viloyati': 1})
+
+    def test_new_complaint_is_counted_immediately(self):
+        self.create_complaint()
+        self.assertEqual(get_complaint_stats(user=self.user).total, 1)
+        self.create_complaint()
+        self.assertEqual(get_complaint_stats(user=self.user).total, 2)
+
+
+class ComplaintCounterTests(ComplaintTestData, TestCase):
+    def counters(self):
+        return {
+            ComplaintCounter.key_for(row): row['count']
+            for row in ComplaintCounter.objects.values(*ComplaintCounter.KEY_FIELDS, 'count')
+            if row['count']
+        }
+
+    def key(self, complaint):
+        return ComplaintCounter.key_for(complaint)
+
+    def test_create_and_delete(self):
+        first = self.create_complaint()
+        self.create_complaint()
+        self.assertEqual(self.counters(), {self.key(first): 2})
+
+        first.delete()
+        self.assertEqual(self.counters(), {self.key(first): 1})
+
+    def test_changes_move_counts_between_keys(self):
+        complaint = self.create_complaint()
+        other = self.create_complaint()
+
+        # Bir obyektni ketma-ket saqlash: oldingi save() qiymatlari asos bo'ladi
+        complaint.status = 'in_progress'
+        complaint.save()
+        complaint.priority = 'high'
+        complaint.save(update_fields=['priority'])
+        complaint.region = self.other_region
+        complaint.district = None
+        complaint.save()
+
+        self.assertEqual(self.counters(), {self.key(other): 1, self.key(complaint): 1})
+        self.assertEqual(self.key(complaint)[0], self.other_region.pk)
+        self.assertEqual(self.key(complaint)[4:], ('in_progress', 'high'))
+
+        loaded = Complaint.objects.get(pk=other.pk)
+        loaded.status = 'rejected'
+        loaded.save()
+        self.assertEqual(self.counters(), {self.key(loaded): 1, self.key(complaint): 1})
+
+    def test_unrelated_save_does_not_change_counters(self):
+        complaint = self.create_complaint()
+        complaint.title = 'Yangi sarlavha'
+        with self.assertNumQueries(4):
+            # SAVEPOINT, UPDATE, qidiruv vektori, RELEASE
+            complaint.save()
+        self.assertEqual(self.counters(), {self.key(complaint): 1})
+
+    def test_rebuild_matches_incremental_counters(self):
+        complaint = self.create_complaint(priority='low')
+        self.create_complaint(region=self.other_region, district=None)
+        self.create_complaint(status='closed').delete()
+        complaint.status = 'in_progress'
+        complaint.save()
+        apply_bulk_action(Complaint.objects.all(), 'priority', 'high', self.admin)
+        incremental = self.counters()
+
+        out = StringIO()
+        call_command('rebuild_complaint_counters', '--check', stdout=out)
+        self.assertIn('Farqlar soni: 0', out.getvalue())
+
+        call_command('rebuild_complaint_counters', stdout=StringIO())
+        self.assertEqual(self.counters(), incremental)
+
+
+class ViewQueryCountTests(ComplaintTestData, TestCase):
+    def assertQueriesAtMost(self, budget, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), budget, '\n'.join(query['sql'] for query in queries))
+        return len(queries)
+
+    def assertListQueriesConstant(self, user, url):
+        self.client.force_login(user)
+        self.create_complaint()
+        # Birinchi so'rov ma'lumotnomalar keshini to'ldiradi
+        self.client.get(url)
+        single = self.assertQueriesAtMost(LIST_QUERY_BUDGET, url)
+
+        for number in range(14):
+            self.create_complaint(title=f'Chiqindi {number}', priority='medium')
+        # Yangi qatorlar kesh qilinmagan - N+1 bo'lsa so'rovlar soni o'sadi
+        self.assertEqual(self.assertQueriesAtMost(LIST_QUERY_BUDGET, url), single)
+
+    def test_user_complaint_list(self):
+        self.assertListQueriesConstant(self.user, reverse('user_complaints'))
+
+    def test_admin_complaint_list(self):
+        self.assertListQueriesConstant(self.admin, reverse('complaints_admin'))
+
+    def test_user_complaint_detail(self):
+        complaint = self.create_complaint()
+        self.client.force_login(self.user)
+        url = reverse('user_complaint_detail', args=(complaint.pk,))
+        self.client.get(url)
+        self.assertQueriesAtMost(DETAIL_QUERY_BUDGET, url)
+
+    def test_admin_complaint_detail(self):
+        complaint = self.create_complaint()
+        self.client.force_login(self.admin)
+        url = reverse('complaint_detail_admin', args=(complaint.pk,))
+        self.client.get(url)
+        self.assertQueriesAtMost(DETAIL_QUERY_BUDGET, url)
+
+
+class ComplaintIndexTests(ComplaintTestData, TestCase):
+    """Ro'yxat filtrlari uchun rejalashtiruvchi mos indeksni tanlashini EXPLAIN orqali tekshiradi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for number in range(20):
+            cls.create_complaint(title=f'Chiqindi {number}', priority='high' if number % 2 else None)
+
+    def setUp(self):
+        super().setUp()
+        # Test jadvali kichik - ketma-ket skanerlash arzonroq bo'lmasligi uchun o'chiriladi
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def test_user_list_uses_user_index(self):
+        self.assertUsesIndex(
+            Complaint.objects.filter(user=self.user).order_by('-created_at')[:10],
+            'complaint_user_created_idx',
+        )
+
+    def test_organization_list_uses_organization_index(self):
+        self.assertUsesIndex(
+            Complaint.objects.filter(masul_tashkilot_id=1, status='new').order_by('-created_at')[:20],
+            'complaint_org_status_idx',
+        )
+
+    def test_status_filter_uses_status_index(self):
+        self.assertUsesIndex(
+            Complaint.objects.filter(status='in_progress').order_by('-created_at')[:20],
+            'complaint_status_created_idx',
+        )
+
+    def test_unprioritized_filter_uses_partial_index(self):
+        self.assertUsesIndex(
+            Complaint.objects.filter(priority__isnull=True).order_by('-created_at')[:20],
+            'complaint_no_priority_idx',
+        )
+
+    def test_home_top_complaints_use_partial_index(self):
+        self.assertUsesIndex(
+            Complaint.objects.filter(priority='high', status__in=['new', 'in_progress']).order_by('-created_at')[:10],
+            'complaint_open_high_idx',
+        )
+
+
+class ImageProcessingTests(ComplaintTestData, TestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        buffer = BytesIO()
+        PILImage.new('RGB', (40, 30), (200, 10, 10)).save(buffer, format='PNG')
+        self.image = Image.objects.create(
+            complaint=self.create_complaint(),
+            img=SimpleUploadedFile('rasm.png', buffer.getvalue()),
+        )
+        self.source_name = self.image.img.name
+
+    def test_failed_processing_releases_written_variants(self):
+        from . import images
+
+        store = images._store
+        calls = []
+
+        def failing_store(*args):
+            calls.append(args)
+            if len(calls) == 3:
+                raise OSError('disk to\'la')
+            return store(*args)
+
+        with mock.patch.object(images, '_store', failing_store), self.assertRaises(OSError):
+            process_image(self.image)
+
+        self.image.refresh_from_db()
+        self.assertEqual(self.image.img.name, self.source_name)
+        self.assertEqual(list(StoredBlob.objects.values_list('name', 'refcount')), [(self.source_name, 1)])
+
+    def test_processing_twice_is_idempotent(self):
+        stale_copy = Image.objects.get(pk=self.image.pk)
+        self.assertIsNotNone(process_image(self.image))
+        # Ikkinchi worker eski nusxa bilan keladi - natijasi tashlab yuboriladi
+        self.assertIsNone(process_image(stale_copy))
+
+        self.image.refresh_from_db()
+        self.assertEqual(self.image.processing_state, 'ready')
+        blobs = dict(StoredBlob.objects.values_list('name', 'refcount'))
+        self.assertNotIn(self.source_name, blobs)
+        # Bir xil mazmunli variantlar bitta faylga ishora qiladi
+        references = Counter(getattr(self.image, name).name for name in Image.FILE_FIELDS)
+        self.assertEqual(blobs, dict(references))
+
+    def test_replacing_file_releases_previous_blob(self):
+        buffer = BytesIO()
+        PILImage.new('RGB', (20, 20), (10, 200, 10)).save(buffer, format='PNG')
+        image = Image.objects.get(pk=self.image.pk)
+        image.img = SimpleUploadedFile('yangi.png', buffer.getvalue())
+        image.save()
+
+        blobs = dict(StoredBlob.objects.values_list('name', 'refcount'))
+        self.assertEqual(blobs, {image.img.name: 1})
+
+
+class ComplaintSearchTests(ComplaintTestData, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.in_title = cls.create_complaint(title="Daraxtlar kesilmoqda", description="Bog'da")
+        cls.in_description = cls.create_complaint(title='Shikoyat', description='Mahallada daraxtlar kesilmoqda')
+        cls.create_complaint(title='Chiqindi', description="Ko'chada chiqindi")
+
+    def test_title_matches_rank_above_description_matches(self):
+        results = list(Complaint.objects.search('daraxtlar').order_by('-search_rank', '-id'))
+        self.assertEqual(results, [self.in_title, self.in_description])
+        self.assertGreater(results[0].search_rank, results[1].search_rank)
+
+    def test_search_vector_survives_later_saves(self):
+        complaint = self.create_complaint(title="Yo'l buzilgan", description='Chuqurlar')
+        complaint.status = 'in_progress'
+        complaint.save()
+        self.assertEqual(list(Complaint.objects.search('chuqurlar')), [complaint])
+
+    def test_cyrillic_query_matches_latin_text(self):
+        self.assertEqual(Complaint.objects.search('дарахтлар').count(), 2)
+
+    def test_search_uses_gin_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = Complaint.objects.search('daraxtlar').explain()
+        self.assertIn('complaint_search_idx', plan, plan)
+
+
+class ComplaintCreateFormTests(ComplaintTestData, TestCase):
+    def form(self, **data):
+        return ComplaintCreateForm(data={'title': 'Chiqindi', 'description': "Ko'chada chiqindi", **data})
+
+    def test_region_and_district_are_required_without_location(self):
+        form = self.form()
+        self.assertFalse(form.is_valid())
+        self.assertIn('region', form.errors)
+        self.assertIn('district', form.errors)
+
+    def test_location_without_loaded_boundaries_still_requires_selection(self):
+        form = self.form(location='SRID=4326;POINT (69.3 41.3)')
+        self.assertFalse(form.is_valid())
+        self.assertIn('region', form.errors)
+
+    def test_selected_region_and_district_are_accepted(self):
+        form = self.form(region=self.region.pk, district=self.district.pk)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_location_inside_boundaries_replaces_selection(self):
+        area = MultiPolygon(Polygon.from_bbox((69.0, 41.0, 70.0, 42.0)), srid=4326)
+        District.objects.filter(pk=self.district.pk).update(boundary=area)
+        Region.objects.filter(pk=self.region.pk).update(boundary=area)
+
+        form = self.form(location='SRID=4326;POINT (69.3 41.3)')
+        self.assertTrue(form.is_valid(), form.errors)
+        form.instance.user = self.user
+        complaint = form.save()
+        self.assertEqual((complaint.region_id, complaint.district_id), (self.region.pk, self.district.pk))
+
+
+class BulkActionTests(ComplaintTestData, TestCase):
+    def test_status_action_skips_closed_complaints(self):
+        closed = self.create_complaint(status='closed', answer_text='Hal qilindi')
+        open_complaint = self.create_complaint()
+
+        updated = apply_bulk_action(Complaint.objects.all(), 'status', 'in_progress', self.admin)
+
+        self.assertEqual(updated, 1)
+        closed.refresh_from_db()
+        open_complaint.refresh_from_db()
+        self.assertEqual(closed.status, 'closed')
+        self.assertEqual(closed.answer_text, 'Hal qilindi')
+        self.assertEqual(open_complaint.status, 'in_progress')
+        self.assertEqual(get_complaint_stats(status='in_progress').total, 1)
+
+
+class ComplaintExportTests(ComplaintTestData, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for number in range(5):
+            cls.create_complaint(title=f'Chiqindi {number}')
+
+    def test_csv_rows_are_fetched_in_chunks(self):
+        chunks = []
+        cursor_iter = compiler.cursor_iter
+
+        def recording_cursor_iter(*args, **kwargs):
+            for rows in cursor_iter(*args, **kwargs):
+                chunks.append(len(rows))
+                yield rows
+
+        with mock.patch.object(compiler, 'cursor_iter', recording_cursor_iter), \
+                mock.patch('complaints.export.EXPORT_CHUNK_SIZE', 2):
+            stream = csv_stream(Complaint.objects.order_by('pk'))
+            next(stream)  # sarlavha
+            next(stream)
+            # Birinchi qator yozilganda faqat birinchi bo'lak o'qilgan
+            self.assertEqual(chunks, [2])
+            self.assertEqual(len(list(stream)), 4)
+        self.assertEqual(chunks, [2, 2, 1])
+
+    def test_export_view_streams_response(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('complaints_admin_export'), {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 6)
+
+    def test_csv_cells_are_not_evaluated_as_formulas(self):
+        complaint = self.create_complaint(title='=HYPERLINK("http://example.com","Bosing")', description='@SUM(A1:A2)')
+        self.create_complaint(title='+998901234567', description='-1+2')
+
+        content = ''.join(csv_stream(Complaint.objects.filter(pk__gte=complaint.pk).order_by('pk')))
+
+        self.assertTrue(content.startswith('\ufeffID,'))
+        rows = list(csv.reader(StringIO(content.lstrip('\ufeff'))))[1:]
+        self.assertEqual(rows[0][1:3], ['\'=HYPERLINK("http://example.com","Bosing")', "'@SUM(A1:A2)"])
+        self.assertEqual(rows[1][1:3], ["'+998901234567", "'-1+2"])
+        self.assertEqual(rows[0][0], str(complaint.pk))
+
+    def test_negative_coordinates_are_not_escaped(self):
+        complaint = self.create_complaint(location=Point(-0.12, -33.9, srid=4326))
+        rows = list(csv.reader(StringIO(''.join(csv_stream(Complaint.objects.filter(pk=complaint.pk))))))
+        self.assertEqual(rows[1][-2:], ['-33.9', '-0.12'])
+
+
+class CardStub:
+    def __init__(self, pk, renders, user):
+        self.pk = pk
+        self.updated_at = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        self.user = user
+        self.user_id = user.pk
+        self.renders = renders
+
+    @property
+    def title(self):
+        self.renders.append(self.pk)
+        return f'Murojaat {self.pk}'
+
+
+class ComplaintCardCacheTests(SimpleTestCase):
+    template = Template(
+        '{% load complaint_cards %}'
+        '{% complaint_cards complaints "test" %}{% for complaint in complaints %}'
+        '{% complaint_card complaint "test" %}<p>{{ complaint.title }}</p>{% endcomplaint_card %}'
+        '{% endfor %}{% endcomplaint_cards %}'
+    )
+
+    def setUp(self):
+        cache.clear()
+        self.renders = []
+        self.author = CustomUser(pk=1, username='fuqaro', updated_at=datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc))
+        self.other = CustomUser(pk=2, username='boshqa', updated_at=self.author.updated_at)
+        self.complaints = [CardStub(pk, self.renders, self.author if pk % 2 else self.other) for pk in range(1, 21)]
+        patcher = mock.patch('complaints.templatetags.complaint_cards.cache', wraps=cache)
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def render(self):
+        return self.template.render(Context({'complaints': self.complaints}))
+
+    def test_page_is_fetched_with_single_get_many(self):
+        first = self.render()
+        self.assertEqual(len(self.renders), 20)
+        self.assertEqual(self.cache.get_many.call_count, 1)
+        self.assertEqual(self.cache.set_many.call_count, 1)
+
+        self.renders.clear()
+        self.cache.reset_mock()
+        self.assertEqual(self.render(), first)
+        # 20 ta kartochka bitta so'rovda keshdan olinadi va qayta render qilinmaydi
+        self.assertEqual(self.renders, [])
+        self.assertEqual(self.cache.get_many.call_count, 1)
+        self.assertEqual(len(self.cache.get_many.call_args.args[0]), 20)
+        self.cache.get.assert_not_called()
+        self.cache.set_many.assert_not_called()
+
+    def test_updated_complaint_is_rendered_again(self):
+        self.render()
+        self.renders.clear()
+        self.complaints[4].updated_at += datetime.timedelta(seconds=1)
+        self.render()
+        self.assertEqual(self.renders, [5])
+
+    def test_renamed_author_cards_are_rendered_again(self):
+        self.render()
+        self.renders.clear()
+        # Foydalanuvchi saqlanganda updated_at yangilanadi (auto_now)
+        self.author.username = 'yangi_nom'
+        self.author.updated_at += datetime.timedelta(seconds=1)
+        self.render()
+        self.assertEqual(self.renders, list(range(1, 21, 2)))
+
+
+class ComplaintImportTests(ComplaintTestData, TestCase):
+    FIELDS = ('title', 'description', 'region', 'district', 'organization', 'status', 'priority', 'lat', 'lng')
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        settings_override = override_settings(TILE_CACHE_DIR=f'{self.tmp}/tiles')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.path = f'{self.tmp}/murojaatlar.csv'
+
+    def write_csv(self, rows):
+        with open(self.path, 'w', newline='', encoding='utf-8') as fh:
+            writer = csv.DictWriter(fh, fieldnames=self.FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+
+    def row(self, title='Chiqindi', **values):
+        return {'title': title, 'description': "Ko'chada chiqindi", 'region': 'Toshkent viloyati', **values}
+
+    def run_import(self, *args):
+        out = StringIO()
+        call_command('import_complaints', self.path, '--user', 'fuqaro', *args, stdout=out)
+        return out.getvalue()
+
+    def error_rows(self):
+        with open(f'{self.path}.errors.csv', newline='', encoding='utf-8') as fh:
+            return list(csv.reader(fh))[1:]
+
+    def command(self, create_missing=False):
+        command = import_complaints.Command()
+        command.create_missing = create_missing
+        command._load_lookups()
+        return command
+
+    def test_invalid_rows_are_rejected(self):
+        command = self.command()
+        cases = [
+            (self.row(status='deleted'), "Noma'lum holat"),
+            (self.row(priority='urgent'), "Noma'lum prioritet"),
+            (self.row(title='x' * 256), 'Sarlavha juda uzun'),
+            (self.row(title=' '), "Sarlavha bo'sh"),
+            (self.row(lat='abc', lng='69.2'), "Noto'g'ri koordinata"),
+            (self.row(lat='91', lng='69.2'), 'chegaradan tashqarida'),
+            (self.row(lat='41.3', lng='nan'), 'chegaradan tashqarida'),
+            (self.row(region='', district='Chirchiq'), 'viloyatsiz'),
+            (self.row(region='Xorazm viloyati'), 'Viloyat topilmadi'),
+        ]
+        for record, message in cases:
+            with self.subTest(message=message):
+                with self.assertRaisesMessage(RowError, message):
+                    command._convert(record)
+
+    def test_names_match_across_scripts_and_case(self):
+        self.assertEqual(name_key('Тошкент  вилояти'), name_key('TOSHKENT viloyati'))
+        command = self.command()
+        values = command._convert(self.row(region='ТОШКЕНТ ВИЛОЯТИ', district='чирчиқ', lat='41.3', lng='69.2'))
+        self.assertEqual(values[4:6], (self.region.pk, self.district.pk))
+        self.assertEqual(values[10], 'SRID=4326;POINT(69.2 41.3)')
+
+    def test_create_missing(self):
+        self.write_csv([self.row(region='Xorazm viloyati', district='Urganch', organization='Obodonlashtirish')])
+        self.run_import()
+        self.assertEqual(Complaint.objects.count(), 0)
+        self.assertIn('Viloyat topilmadi', self.error_rows()[0][1])
+
+        self.run_import('--create-missing')
+        complaint = Complaint.objects.get()
+        self.assertEqual(complaint.region.name, 'Xorazm viloyati')
+        self.assertEqual(complaint.district.name, 'Urganch')
+        self.assertEqual(complaint.district.region, complaint.region)
+        self.assertEqual(complaint.masul_tashkilot.name, 'Obodonlashtirish')
+        self.assertEqual(self.error_rows(), [])
+
+    def test_errors_file_lists_failed_rows(self):
+        self.write_csv([self.row(), self.row(status='deleted'), self.row(title='Suv')])
+        output = self.run_import()
+
+        self.assertIn('2 ta murojaat yuklandi, 1 ta xato', output)
+        [(number, error, data)] = self.error_rows()
+        self.assertEqual(number, '2')
+        self.assertEqual(error, "Noma'lum holat: deleted")
+        self.assertEqual(json.loads(data)['status'], 'deleted')
+
+    def test_end_to_end_import_updates_search_and_counters(self):
+        self.write_csv([
+            self.row(title="Daraxtlar kesilmoqda", district='Чирчиқ', priority='high', lat='41.47', lng='69.58'),
+            self.row(title='Suv yo\'q', status='closed'),
+        ])
+        self.run_import('--batch', '1')
+
+        self.assertEqual(Complaint.objects.count(), 2)
+        found = Complaint.objects.search('дарахтлар').get()
+        self.assertEqual(found.district, self.district)
+        self.assertEqual(found.user, self.user)
+        self.assertEqual((found.location.x, found.location.y), (69.58, 41.47))
+        stats = get_complaint_stats(region=self.region)
+        self.assertEqual(stats.total, 2)
+        self.assertEqual(stats.status_count('closed'), 1)
+        self.assertEqual(stats.priority_count('high'), 1)
+
+    def test_missing_user_or_file_is_an_error(self):
+        self.write_csv([self.row()])
+        with self.assertRaisesMessage(CommandError, 'Foydalanuvchi topilmadi'):
+            call_command('import_complaints', self.path, '--user', 'yoq', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'Fayl topilmadi'):
+            call_command('import_complaints', f'{self.tmp}/yoq.csv', '--user', 'fuqaro', stdout=StringIO())
+
+    def test_resume_skips_committed_rows_and_does_not_repeat_errors(self):
+        self.write_csv([
+            self.row(title='Birinchi'),
+            self.row(title='Ikkinchi'),
+            self.row(title='Uchinchi', status='deleted'),
+            self.row(title='To\'rtinchi'),
+            self.row(title='Beshinchi'),
+        ])
+        flush = import_complaints.Command._flush
+        calls = []
+
+        def failing_flush(command, batch):
+            calls.append(len(batch))
+            if len(calls) == 2:
+                raise RuntimeError('aloqa uzildi')
+            return flush(command, batch)
+
+        with mock.patch.object(import_complaints.Command, '_flush', failing_flush):
+            with self.assertRaisesMessage(RuntimeError, 'aloqa uzildi'):
+                self.run_import('--batch', '2')
+
+        self.assertEqual(sorted(Complaint.objects.values_list('title', flat=True)), ['Birinchi', 'Ikkinchi'])
+        with open(f'{self.path}.checkpoint') as fh:
+            self.assertEqual(json.load(fh), {'row': 2})
+        # 3-qator xatosi uning partiyasi saqlanmagani uchun hali yozilmagan
+        self.assertEqual(self.error_rows(), [])
+
+        output = self.run_import('--batch', '2', '--resume')
+
+        self.assertIn('2-qatordan keyin davom ettiriladi', output)
+        self.assertEqual(Complaint.objects.count(), 4)
+        self.assertEqual([row[0] for row in self.error_rows()], ['3'])
+        with open(f'{self.path}.checkpoint') as fh:
+            self.assertEqual(json.load(fh), {'row': 5})
+
+        # Hammasi yuklangan - qayta ishga tushirish hech narsa qo'shmaydi
+        self.run_import('--batch', '2', '--resume')
+        self.assertEqual(Complaint.objects.count(), 4)
+        self.assertEqual([row[0] for row in self.error_rows()], ['3'])
+
+
+class DuplicateDetectionTests(ComplaintTestData, TestCase):
+    # ~111 m bir kenglik gradusining mingdan biri
+    ORIGIN = (69.2401, 41.3111)
+
+    def complaint_at(self, dlat=0.0, **kwargs):
+        values = {
+            'title': "Ko'chada chiqindi uyumi",
+            'description': "Hovlilar orasida chiqindi to'planib qolgan",
+            'location': Point(self.ORIGIN[0], self.ORIGIN[1] + dlat, srid=4326),
+        }
+        values.update(kwargs)
+        return self.create_complaint(**values)
+
+    def test_nearby_similar_complaints_join_one_cluster(self):
+        original = self.complaint_at()
+        second = self.complaint_at(dlat=0.0005)
+        third = self.complaint_at(dlat=-0.0008, title="Ko'chada chiqindi uyumlari")
+
+        self.assertEqual(link_duplicate(second), original)
+        link_duplicate(third)
+
+        second.refresh_from_db()
+        third.refresh_from_db()
+        self.assertEqual(second.duplicate_of, original)
+        # Klaster asosiy murojaatga bog'lanadi, takroriyga emas
+        self.assertEqual(third.duplicate_of, original)
+
+    def test_complaint_outside_radius_is_not_linked(self):
+        self.complaint_at()
+        far = self.complaint_at(dlat=0.01)
+
+        self.assertIsNone(link_duplicate(far))
+        far.refresh_from_db()
+        self.assertIsNone(far.duplicate_of)
+
+    def test_unrelated_text_is_not_linked(self):
+        self.complaint_at()
+        other = self.complaint_at(dlat=0.0002, title="Svetofor ishlamayapti", description='Chorrahada chiroq yonmaydi')
+        self.assertIsNone(link_duplicate(other))
+
+    def test_closed_complaints_are_ignored(self):
+        self.complaint_at(status='closed')
+        self.complaint_at(dlat=0.0003, status='rejected')
+        new = self.complaint_at(dlat=0.0005)
+        self.assertIsNone(link_duplicate(new))
+
+    def test_complaint_without_location_is_not_linked(self):
+        self.complaint_at()
+        self.assertIsNone(link_duplicate(self.create_complaint(title="Ko'chada chiqindi uyumi")))
+
+
+class ComplaintRoutingTests(ComplaintTestData, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_district = District.objects.create(name='Angren', region=cls.region)
+        cls.area_org = cls.organization(
+            'Chirchiq obodonlashtirish',
+            service_area=MultiPolygon(Polygon.from_bbox((69.5, 41.4, 69.7, 41.6)), srid=4326),
+        )
+        cls.district_org = cls.organization('Chirchiq hokimligi', hudud=cls.district)
+        cls.second_district_org = cls.organization('Chirchiq suv taminoti', hudud=cls.district)
+        cls.angren_org = cls.organization('Angren hokimligi', hudud=cls.other_district)
+        cls.nearby_org = cls.organization('Toshkent markaz', location=Point(69.24, 41.31, srid=4326))
+
+    @classmethod
+    def organization(cls, name, **kwargs):
+        return Tashkilot.objects.create(name=name, manzil='', telefon='', email='', **kwargs)
+
+    def test_service_area_wins_over_district(self):
+        complaint = self.create_complaint(location=Point(69.58, 41.47, srid=4326))
+        self.assertEqual(route_complaint(complaint), self.area_org)
+
+    def test_district_organization_is_used_without_location(self):
+        complaint = self.create_complaint(district=self.other_district)
+        self.assertEqual(route_complaint(complaint), self.angren_org)
+
+    def test_nearest_organization_is_used_outside_areas_and_districts(self):
+        complaint = self.create_complaint(district=None, location=Point(69.3, 41.35, srid=4326))
+        self.assertEqual(route_complaint(complaint), self.nearby_org)
+
+    def test_unmatched_complaint_is_left_unassigned(self):
+        complaint = self.create_complaint(region=self.other_region, district=None)
+        self.assertIsNone(route_complaint(complaint))
+
+        call_command('route_complaints', stdout=StringIO())
+        complaint.refresh_from_db()
+        self.assertIsNone(complaint.masul_tashkilot)
+
+    def test_command_spreads_load_and_is_idempotent(self):
+        first = self.create_complaint()
+        second = self.create_complaint()
+        covered = self.create_complaint(location=Point(69.58, 41.47, srid=4326))
+        closed = self.create_complaint(status='closed')
+        unmatched = self.create_complaint(region=self.other_region, district=None)
+
+        out = StringIO()
+        call_command('route_complaints', '--batch', '2', stdout=out)
+        self.assertIn("Yo'naltirildi: 3 ta murojaat, 1 ta nomzodsiz", out.getvalue())
+
+        assigned = dict(Complaint.objects.values_list('pk', 'masul_tashkilot_id'))
+        # Bir tumandagi ikki tashkilot orasida yuklama bo'yicha taqsimlanadi
+        self.assertEqual(
+            {assigned[first.pk], assigned[second.pk]},
+            {self.district_org.pk, self.second_district_org.pk},
+        )
+        self.assertEqual(assigned[covered.pk], self.area_org.pk)
+        self.assertIsNone(assigned[closed.pk])
+        self.assertIsNone(assigned[unmatched.pk])
+
+        out = StringIO()
+        call_command('route_complaints', stdout=out)
+        self.assertIn("Yo'naltirildi: 0 ta murojaat, 1 ta nomzodsiz", out.getvalue())
+        self.assertEqual(dict(Complaint.objects.values_list('pk', 'masul_tashkilot_id')), assigned)
+
+        out = StringIO()
+        call_command('rebuild_complaint_counters', '--check', stdout=out)
+        self.assertIn('Farqlar soni: 0', out.getvalue())
+
+    def test_dry_run_does_not_assign(self):
+        complaint = self.create_complaint()
+        call_command('route_complaints', '--dry-run', stdout=StringIO())
+        complaint.refresh_from_db()
+        self.assertIsNone(complaint.masul_tashkilot)
+
+
+class ComplaintListCursorTests(ComplaintTestData, TestCase):
+    def test_search_cursor_is_rejected_without_search(self):
+        for number in range(21):
+            self.create_complaint(title=f'Daraxtlar kesilmoqda {number}')
+        self.client.force_login(self.admin)
+        url = reverse('complaints_admin')
+
+        cursor = self.client.get(url, {'q': 'daraxtlar'}).context['page_obj'].next_cursor
+        self.assertIsNotNone(cursor)
+
+        self.assertEqual(self.client.get(url, {'q': 'daraxtlar', 'cursor': cursor}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'cursor': cursor}).status_code, 404)
+
+
+class CachedFacetsTests(ComplaintTestData, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.superuser = CustomUser.objects.create_superuser('bosh', 'bosh@example.com', 'parol123')
+
+    def setUp(self):
+        super().setUp()
+        self.create_complaint()
+        self.create_complaint(status='in_progress')
+
+    def status_facets(self):
+        request = RequestFactory().get(reverse('admin:complaints_complaint_changelist'), {'_facets': 'True'})
+        request.user = self.superuser
+        changelist = admin.site._registry[Complaint].get_changelist_instance(request)
+        [spec] = [spec for spec in changelist.filter_specs if getattr(spec, 'field_path', None) == 'status']
+        return lambda: spec.get_facet_queryset(changelist)
+
+    def test_facet_counts_are_served_from_cache(self):
+        first = self.status_facets()()
+        self.assertEqual(sum(first.values()), 2)
+
+        facets = self.status_facets()
+        with self.assertNumQueries(0):
+            self.assertEqual(facets(), first)
+
+    def test_facet_counts_are_invalidated_when_complaints_change(self):
+        before = self.status_facets()()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            complaint = self.create_complaint()
+        after_create = self.status_facets()()
+        self.assertEqual(sum(after_create.values()), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_bulk_action(Complaint.objects.filter(pk=complaint.pk), 'status', 'rejected', self.admin)
+        after_bulk = self.status_facets()()
+        self.assertNotEqual(after_bulk, after_create)
+        self.assertEqual(sum(after_bulk.values()), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            complaint.delete()
+        self.assertEqual(self.status_facets()(), before)
@@ -17,6 +17,7 @@ urlpatterns = [
     # ============================================================================
     path('dashboard/management/', views.AdminDashboardView.as_view(), name='dashboard_admin'),
     path('dashboard/management/complaints/', views.AdminComplaintListView.as_view(), name='complaints_admin'),
+    path('dashboard/management/complaints/export/', views.AdminComplaintExportView.as_view(), name='complaints_admin_export'),
     path('dashboard/management/complaint/<int:pk>/', views.AdminComplaintDetailView.as_view(), name='complaint_detail_admin'),
     path('dashboard/management/complaint/<int:pk>/update/', views.AdminComplaintUpdateView.as_view(), name='complaint_update_admin'),
     
@@ -1,15 +1,25 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import redirect
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
 from django.urls import reverse_lazy
-from django.db.models import Count, Q
 from django.utils import timezone
+from django.db import transaction
+from django.conf import settings
+from django.http import Http404
 
 from .models import Complaint, Image
+from .stats import get_complaint_stats
+from .duplicates import link_duplicate
+from .routing import route_complaint, suggest_organizations
+from .bulk import BULK_STATUSES, BulkActionError, apply_bulk_action
+from .export import EXPORT_FORMATS, export_response
 from .forms import ComplaintCreateForm, ComplaintAdminUpdateForm, ComplaintModeratorUpdateForm, TashkilotForm, UserCreateForm
-from common.models import Region, District, Tashkilot
+from common.models import Tashkilot
 from users.models import CustomUser
+from common.pagination import KeysetPaginationMixin
+from common.jobs import enqueue
+from common import reference
 
 
 # ============================================================================
@@ -59,17 +69,18 @@ class UserDashboardView(LoginRequiredMixin, UserRoleMixin, TemplateView):
         user = self.request.user
         
         user_complaints = Complaint.objects.filter(user=user)
+        stats = get_complaint_stats(user=user)
         
-        total_count = user_complaints.count()
-        closed_count = user_complaints.filter(status='closed').count()
-        in_progress_count = user_complaints.filter(status__in=['new', 'in_progress']).count()
-        rejected_count = user_complaints.filter(status='rejected').count()
+        total_count = stats.total
+        closed_count = stats.status_count('closed')
+        in_progress_count = stats.status_count('new', 'in_progress')
+        rejected_count = stats.status_count('rejected')
 
         success_rate = 0
         if total_count > 0:
             success_rate = round((closed_count / total_count) * 100, 1)
 
-        recent_complaints = user_complaints.order_by('-created_at')[:5]
+        recent_complaints = user_complaints.for_listing().order_by('-created_at')[:5]
 
         context.update({
             'total_count': total_count,
@@ -90,7 +101,7 @@ class UserComplaintListView(LoginRequiredMixin, UserRoleMixin, ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        return Complaint.objects.filter(user=self.request.user).order_by('-created_at')
+        return Complaint.objects.filter(user=self.request.user).for_listing().order_by('-created_at')
 
 
 class UserComplaintDetailView(LoginRequiredMixin, UserRoleMixin, DetailView):
@@ -100,7 +111,7 @@ class UserComplaintDetailView(LoginRequiredMixin, UserRoleMixin, DetailView):
     context_object_name = 'complaint'
 
     def get_queryset(self):
-        return Complaint.objects.filter(user=self.request.user)
+        return Complaint.objects.filter(user=self.request.user).for_detail()
 
 
 class UserComplaintCreateView(LoginRequiredMixin, UserRoleMixin, CreateView):
@@ -112,14 +123,28 @@ class UserComplaintCreateView(LoginRequiredMixin, UserRoleMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.user = self.request.user
-        response = super().form_valid(form)
-        
-        # Handle multiple image uploads
-        images = self.request.FILES.getlist('images')
-        for img in images:
-            Image.objects.create(complaint=self.object, img=img)
+        with transaction.atomic():
+            response = super().form_valid(form)
+            
+            # Handle multiple image uploads: fayllar xom holida saqlanadi,
+            # o'lchamini o'zgartirish va tekshirish fon worker'ida bajariladi
+            images = Image.objects.bulk_create([
+                Image(complaint=self.object, img=img)
+                for img in self.request.FILES.getlist('images')
+            ])
+            if images:
+                enqueue('process_complaint_images', image_ids=[image.pk for image in images])
+            
+            duplicate = link_duplicate(self.object)
+            
+            if settings.AUTO_ROUTE_COMPLAINTS:
+                self.object.masul_tashkilot = route_complaint(self.object)
+                if self.object.masul_tashkilot:
+                    self.object.save(update_fields=['masul_tashkilot', 'updated_at'])
         
         messages.success(self.request, 'Murojaatingiz muvaffaqiyatli yuborildi!')
+        if duplicate:
+            messages.info(self.request, 'Shu joyda o\'xshash murojaat allaqachon ko\'rib chiqilmoqda.')
         return response
 
 
@@ -169,26 +194,25 @@ class AdminDashboardView(LoginRequiredMixin, AdminRoleMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         
         all_complaints = Complaint.objects.all()
+        stats = get_complaint_stats(by_region=True)
         
         # Status statistics
-        total_count = all_complaints.count()
-        new_count = all_complaints.filter(status='new').count()
-        in_progress_count = all_complaints.filter(status='in_progress').count()
-        closed_count = all_complaints.filter(status='closed').count()
-        rejected_count = all_complaints.filter(status='rejected').count()
+        total_count = stats.total
+        new_count = stats.status_count('new')
+        in_progress_count = stats.status_count('in_progress')
+        closed_count = stats.status_count('closed')
+        rejected_count = stats.status_count('rejected')
         
         # Priority statistics
-        high_priority = all_complaints.filter(priority='high').count()
-        medium_priority = all_complaints.filter(priority='medium').count()
-        low_priority = all_complaints.filter(priority='low').count()
+        high_priority = stats.priority_count('high')
+        medium_priority = stats.priority_count('medium')
+        low_priority = stats.priority_count('low')
         
         # Region statistics
-        region_stats = all_complaints.values('region__name').annotate(
-            count=Count('id')
-        ).order_by('-count')[:5]
+        region_stats = stats.top_regions(5)
         
         # Recent complaints
-        recent_complaints = all_complaints.order_by('-created_at')[:10]
+        recent_complaints = all_complaints.for_listing().order_by('-created_at')[:10]
         
         context.update({
             'total_count': total_count,
@@ -205,20 +229,22 @@ class AdminDashboardView(LoginRequiredMixin, AdminRoleMixin, TemplateView):
         return context
 
 
-class AdminComplaintListView(LoginRequiredMixin, AdminRoleMixin, ListView):
+class AdminComplaintListView(LoginRequiredMixin, AdminRoleMixin, KeysetPaginationMixin, ListView):
     """Admin view of all complaints with filters"""
     model = Complaint
     template_name = 'complaints/admin_complaint_list.html'
     context_object_name = 'complaints'
     paginate_by = 20
+    keyset_estimate_count = True
 
     def get_queryset(self):
-        queryset = Complaint.objects.all().order_by('-created_at')
+        queryset = Complaint.objects.for_listing().order_by('-created_at')
         
         # Apply filters
         status = self.request.GET.get('status')
         priority = self.request.GET.get('priority')
         region = self.request.GET.get('region')
+        search = self.request.GET.get('q', '').strip()
         
         if status:
             queryset = queryset.filter(status=status)
@@ -226,24 +252,51 @@ class AdminComplaintListView(LoginRequiredMixin, AdminRoleMixin, ListView):
             queryset = queryset.filter(priority=priority)
         if region:
             queryset = queryset.filter(region_id=region)
+        if search:
+            queryset = queryset.search(search)
         
         return queryset
     
+    def get_keyset_ordering(self):
+        # Qidiruvda natijalar moslik darajasi bo'yicha tartiblanadi
+        if self.request.GET.get('q', '').strip():
+            return ('-search_rank', '-id')
+        return super().get_keyset_ordering()
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['regions'] = Region.objects.all()
+        context['regions'] = reference.regions()
         context['selected_status'] = self.request.GET.get('status', '')
         context['selected_priority'] = self.request.GET.get('priority', '')
         context['selected_region'] = self.request.GET.get('region', '')
+        context['search_query'] = self.request.GET.get('q', '')
         return context
 
 
+class AdminComplaintExportView(AdminComplaintListView):
+    """Export complaints matching the list filters as CSV, XLSX or GeoJSON"""
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise Http404('Noma\'lum eksport formati')
+        return export_response(self.get_queryset(), export_format)
+
+
 class AdminComplaintDetailView(LoginRequiredMixin, AdminRoleMixin, DetailView):
     """Admin detail view of complaint"""
     model = Complaint
     template_name = 'complaints/admin_complaint_detail.html'
     context_object_name = 'complaint'
 
+    def get_queryset(self):
+        return Complaint.objects.for_detail().select_related('duplicate_of')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['duplicates'] = self.object.duplicates.order_by('created_at')
+        return context
+
 
 class AdminComplaintUpdateView(LoginRequiredMixin, AdminRoleMixin, UpdateView):
     """Admin update complaint (assign org, change priority, change status)"""
@@ -254,6 +307,12 @@ class AdminComplaintUpdateView(LoginRequiredMixin, AdminRoleMixin, UpdateView):
     def get_success_url(self):
         return reverse_lazy('complaint_detail_admin', kwargs={'pk': self.object.pk})
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if not self.object.masul_tashkilot_id:
+            context['routing_suggestions'] = suggest_organizations(self.object)
+        return context
+
     def form_valid(self, form):
         if form.instance.status == 'closed' and not form.instance.answer_text:
             form.add_error('answer_text', 'Murojaatni yopish uchun javob matnini kiritishingiz kerak.')
@@ -309,15 +368,16 @@ class AdminOrganizationDeleteView(LoginRequiredMixin, AdminRoleMixin, DeleteView
         return super().delete(request, *args, **kwargs)
 
 
-class AdminPriorityManagementView(LoginRequiredMixin, AdminRoleMixin, ListView):
+class AdminPriorityManagementView(LoginRequiredMixin, AdminRoleMixin, KeysetPaginationMixin, ListView):
     """Admin priority management page - filter by priority and assign priority"""
     model = Complaint
     template_name = 'complaints/admin_priority_management.html'
     context_object_name = 'complaints'
     paginate_by = 20
+    keyset_estimate_count = True
 
     def get_queryset(self):
-        queryset = Complaint.objects.all().order_by('-created_at')
+        queryset = Complaint.objects.for_listing().order_by('-created_at')
         
         # Filter by priority
         priority_filter = self.request.GET.get('priority')
@@ -333,23 +393,49 @@ class AdminPriorityManagementView(LoginRequiredMixin, AdminRoleMixin, ListView):
         context['selected_priority'] = self.request.GET.get('priority', '')
         
         # Count complaints by priority
-        context['null_priority_count'] = Complaint.objects.filter(priority__isnull=True).count()
-        context['low_priority_count'] = Complaint.objects.filter(priority='low').count()
-        context['medium_priority_count'] = Complaint.objects.filter(priority='medium').count()
-        context['high_priority_count'] = Complaint.objects.filter(priority='high').count()
+        stats = get_complaint_stats()
+        context['null_priority_count'] = stats.priority_count(None)
+        context['low_priority_count'] = stats.priority_count('low')
+        context['medium_priority_count'] = stats.priority_count('medium')
+        context['high_priority_count'] = stats.priority_count('high')
+        
+        # Ommaviy amallar paneli uchun
+        context['bulk_status_choices'] = [
+            (value, label) for value, label in Complaint.STATUS_CHOICES if value in BULK_STATUSES
+        ]
+        context['organizations'] = reference.organizations()
         
         return context
     
     def post(self, request, *args, **kwargs):
-        """Handle priority assignment"""
-        complaint_id = request.POST.get('complaint_id')
-        new_priority = request.POST.get('priority')
-        
-        if complaint_id and new_priority in ['low', 'medium', 'high']:
-            complaint = get_object_or_404(Complaint, id=complaint_id)
-            complaint.priority = new_priority
-            complaint.save()
-            messages.success(request, f'Murojaat uchun "{dict(Complaint.PRIORITY_CHOICES)[new_priority]}" prioritet belgilandi!')
+        """Handle priority/status/organization assignment for one, selected or all filtered complaints"""
+        action = request.POST.get('action', 'priority')
+        value = request.POST.get('value') or request.POST.get('priority')
+        
+        if request.POST.get('scope') == 'all':
+            # Joriy filtrga mos barcha murojaatlar
+            queryset = self.get_queryset()
+            complaint_ids, filters = None, request.GET.dict()
+        else:
+            complaint_ids = [
+                int(pk) for pk in request.POST.getlist('complaint_ids') + request.POST.getlist('complaint_id')
+                if pk.isdigit()
+            ]
+            queryset = Complaint.objects.filter(pk__in=complaint_ids)
+            filters = None
+            if not complaint_ids:
+                messages.error(request, 'Hech qanday murojaat tanlanmadi.')
+                return redirect(request.path + '?' + request.GET.urlencode())
+        
+        try:
+            updated = apply_bulk_action(
+                queryset, action, value, request.user,
+                complaint_ids=complaint_ids, filters=filters,
+            )
+        except BulkActionError:
+            messages.error(request, "Noto'g'ri amal yoki qiymat tanlandi.")
+        else:
+            messages.success(request, f'{updated} ta murojaat yangilandi!')
         
         return redirect(request.path + '?' + request.GET.urlencode())
 
@@ -459,13 +545,14 @@ class ModeratorDashboardView(LoginRequiredMixin, ModeratorRoleMixin, TemplateVie
         
         # Get complaints assigned to moderator's organization
         org_complaints = Complaint.objects.filter(masul_tashkilot=user.tashkilot)
+        stats = get_complaint_stats(masul_tashkilot=user.tashkilot)
         
-        total_count = org_complaints.count()
-        new_count = org_complaints.filter(status='new').count()
-        in_progress_count = org_complaints.filter(status='in_progress').count()
-        closed_count = org_complaints.filter(status='closed').count()
+        total_count = stats.total
+        new_count = stats.status_count('new')
+        in_progress_count = stats.status_count('in_progress')
+        closed_count = stats.status_count('closed')
         
-        recent_complaints = org_complaints.order_by('-created_at')[:10]
+        recent_complaints = org_complaints.for_listing().order_by('-created_at')[:10]
         
         context.update({
             'total_count': total_count,
@@ -488,18 +575,23 @@ class ModeratorComplaintListView(LoginRequiredMixin, ModeratorRoleMixin, ListVie
     def get_queryset(self):
         queryset = Complaint.objects.filter(
             masul_tashkilot=self.request.user.tashkilot
-        ).order_by('-created_at')
+        ).for_listing().order_by('-created_at')
         
         # Apply status filter
         status = self.request.GET.get('status')
         if status:
             queryset = queryset.filter(status=status)
         
+        search = self.request.GET.get('q', '').strip()
+        if search:
+            queryset = queryset.search(search).order_by('-search_rank', '-created_at')
+        
         return queryset
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['selected_status'] = self.request.GET.get('status', '')
+        context['search_query'] = self.request.GET.get('q', '')
         return context
 
 
@@ -510,7 +602,7 @@ class ModeratorComplaintDetailView(LoginRequiredMixin, ModeratorRoleMixin, Detai
     context_object_name = 'complaint'
 
     def get_queryset(self):
-        return Complaint.objects.filter(masul_tashkilot=self.request.user.tashkilot)
+        return Complaint.objects.filter(masul_tashkilot=self.request.user.tashkilot).for_detail()
 
 
 class ModeratorComplaintUpdateView(LoginRequiredMixin, ModeratorRoleMixin, UpdateView):
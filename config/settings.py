@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from environs import Env
+from urllib.parse import urlsplit
 import os
 env = Env()
 env.read_env()
@@ -45,12 +46,14 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     'django.contrib.gis',
+    'django.contrib.postgres',
     "users",
     "complaints",
     "common",
 ]
 
 MIDDLEWARE = [
+    "common.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -129,7 +132,7 @@ USE_TZ = True
 
 
 # Emailga sms yuborish uchun sozlamalar
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = env.str("EMAIL_BACKEND", default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -155,6 +158,49 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Vektor tayllar keshi (common/tiles.py)
+TILE_CACHE_DIR = env.path("TILE_CACHE_DIR", default=BASE_DIR / 'tile_cache')
+
+# Yangi murojaatlarga mas'ul tashkilotni avtomatik biriktirish (complaints/routing.py)
+AUTO_ROUTE_COMPLAINTS = env.bool("AUTO_ROUTE_COMPLAINTS", default=False)
+
+# So'rov metrikalari (common/middleware.py): shu chegaralardan oshgan so'rovlar logga yoziladi
+METRICS_QUERY_BUDGET = env.int("METRICS_QUERY_BUDGET", default=50)
+METRICS_LATENCY_BUDGET_MS = env.int("METRICS_LATENCY_BUDGET_MS", default=1000)
+# Bo'sh bo'lsa /metrics faqat staff foydalanuvchilarga ochiq
+METRICS_TOKEN = env.str("METRICS_TOKEN", default="")
+
+# Umumiy kesh (common/cache.py): xarita, ma'lumotnomalar va murojaat kartochkalari.
+#   locmem://                  - bitta jarayon (standart, ishlab chiqish uchun)
+#   file:///var/cache/murojaat - bitta server, barcha workerlar uchun umumiy
+#   redis://host:6379/0        - bir nechta server (`redis` paketi kerak)
+CACHE_URL = env.str("CACHE_URL", default="locmem://")
+_cache_url = urlsplit(CACHE_URL)
+if _cache_url.scheme in ('redis', 'rediss'):
+    _cache_backend = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_URL,
+    }
+elif _cache_url.scheme == 'file':
+    _cache_backend = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': _cache_url.path,
+    }
+elif _cache_url.scheme == 'locmem':
+    _cache_backend = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': _cache_url.netloc,
+    }
+else:
+    raise ValueError(f"CACHE_URL sxemasi qo'llab-quvvatlanmaydi: {CACHE_URL}")
+CACHES = {
+    'default': {
+        **_cache_backend,
+        'TIMEOUT': env.int("CACHE_TIMEOUT", default=300),
+        'KEY_PREFIX': env.str("CACHE_KEY_PREFIX", default="murojaat"),
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
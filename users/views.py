@@ -9,8 +9,8 @@ from django.contrib.auth import authenticate
 from .forms import RegisterForm
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
 from django.conf import settings
+from common.jobs import enqueue
 import random
 
 # Create your views here.
@@ -35,10 +35,14 @@ class SignUp(generic.CreateView):
         email_from = settings.EMAIL_HOST_USER
         recipient_list = [user.email]
         
-        try:
-            send_mail(subject, message, email_from, recipient_list)
-        except Exception as e:
-            print(f"Email yuborishda xatolik: {e}")
+        # Email so'rov ichida emas, fon worker'ida (run_worker) yuboriladi
+        enqueue(
+            'send_email',
+            subject=subject,
+            message=message,
+            from_email=email_from,
+            recipient_list=recipient_list,
+        )
 
         self.request.session['verification_code'] = code
         self.request.session['user_id'] = user.id